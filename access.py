@@ -0,0 +1,107 @@
+import logging
+
+import discord
+
+from guild_config import *
+from game_config import *
+from core import WerewolfGame
+from channels import channel_cache
+from ledger import OverwriteLedger
+from scheduler import RestCall, RestScheduler, ScheduleSummary, member_bucket, permissions_bucket
+
+log = logging.getLogger(__name__)
+
+# Role channels from the catalog plus DEAD; NARRATOR_CONTROL and GENERAL aren't gated by game roles
+CHANNEL_LABELS = {info.channel: role.value for role, info in ROLES.items() if info.channel is not None} | {"DEAD": "Dead"}
+ACCESS_CHANNELS = list(CHANNEL_LABELS)
+
+def access_role_name(table: TableConfig, channel_name: str) -> str:
+    return f"{table.role_prefix}: {CHANNEL_LABELS[channel_name]}"
+
+# ============================================================
+# PROVISIONING
+# ============================================================
+
+# (guild ID, narrator control ID) -> channel name -> access role ID
+_provisioned: dict[tuple[int, int], dict[str, int]] = {}
+
+async def provision_roles(guild: discord.Guild, table: TableConfig, scheduler: RestScheduler) -> dict[str, discord.Role]:
+    """
+    Finds or creates one guild role per access channel and gives it a single overwrite on that
+    channel. Runs its REST calls only the first time per table, or when a role has gone missing.
+    """
+    key = (guild.id, table.narrator_control)
+    cached = _provisioned.get(key, {})
+    channels = {name: channel for name in ACCESS_CHANNELS if (channel := channel_cache.text(guild, table, name)) is not None}
+    # A channel deleted or retyped since provisioning drops out, along with its role
+    roles = {name: role for name, role_id in cached.items() if name in channels and (role := guild.get_role(role_id)) is not None}
+    if len(roles) == len(channels): return roles
+
+    # === Roles ===
+    calls = []
+    for name in channels:
+        if name in roles: continue
+        role_name = access_role_name(table, name)
+        existing = discord.utils.get(guild.roles, name=role_name)
+        if existing is not None: roles[name] = existing
+        else: calls.append(RestCall(name, ("roles", guild.id), lambda n=role_name: guild.create_role(name=n, reason="Werewolf channel access")))
+    summary = await scheduler.run(calls)
+    for result in summary.results:
+        if result.ok: roles[result.label] = result.value
+
+    # === Overwrites ===
+    calls = []
+    for name, role in roles.items():
+        channel = channels[name]
+        if channel.overwrites_for(role).read_messages: continue
+        calls.append(RestCall(role.name, permissions_bucket(channel.id), lambda c=channel, r=role: c.set_permissions(r, read_messages=True, send_messages=True)))
+    summary = await scheduler.run(calls)
+    for result in summary.failed:
+        log.warning(f"Failed to set overwrite for {result.label}: {result.error}")
+
+    _provisioned[key] = {name: role.id for name, role in roles.items()}
+    log.info(f"Provisioned {len(roles)} access roles for table {table.narrator_control}")
+    return roles
+
+# ============================================================
+# GRANTS
+# ============================================================
+
+async def grant_roles(guild: discord.Guild, game: WerewolfGame, roles: dict[str, discord.Role], ledger: OverwriteLedger, scheduler: RestScheduler) -> ScheduleSummary:
+    """Gives each player their role channel's access role, one member edit per player."""
+    calls = []
+    for player in game.players:
+        if player.role is None:
+            raise Exception("Player with None role after role setup")
+        if player.id < 0: continue # Dummy player
+        role = roles.get(ROLES[player.role].channel) # type: ignore
+        if role is None: continue
+        member = guild.get_member(player.id)
+        if member is None:
+            raise Exception("Unable to get member for player")
+        ledger.record_role(role.id, member.id)
+        calls.append(RestCall(f"{player.name} -> {role.name}", member_bucket(member), lambda m=member, r=role: m.add_roles(r, reason="Werewolf game")))
+
+    # Written before granting so a crash mid-setup still leaves a record to revoke
+    ledger.save()
+    return await scheduler.run(calls)
+
+async def bury(guild: discord.Guild, game: WerewolfGame, deaths: list[int], roles: dict[str, discord.Role], ledger: OverwriteLedger, scheduler: RestScheduler) -> ScheduleSummary:
+    """
+    Moves the dead from their role channel to DEAD. Only the two access roles are touched, so
+    role changes made elsewhere while the game runs aren't reverted.
+    """
+    dead_role = roles.get("DEAD")
+    calls = []
+    for user_id in deaths:
+        member = guild.get_member(user_id)
+        player = game.roster.players.get(user_id)
+        if member is None or player is None or player.role is None: continue
+        old_role = roles.get(ROLES[player.role].channel) # type: ignore
+        if old_role is not None:
+            calls.append(RestCall(f"{player.name} -/ {old_role.name}", member_bucket(member), lambda m=member, r=old_role: m.remove_roles(r, reason="Werewolf death")))
+        if dead_role is not None:
+            ledger.record_role(dead_role.id, member.id)
+            calls.append(RestCall(f"{player.name} -> dead", member_bucket(member), lambda m=member, r=dead_role: m.add_roles(r, reason="Werewolf death")))
+    ledger.save()
+    return await scheduler.run(calls)
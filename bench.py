@@ -0,0 +1,61 @@
+#!/usr/bin/env -S uv run --script
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from game_config import *
+from core import STRATEGIES, run_game
+
+# ============================================================
+# BENCHMARKS
+# ============================================================
+
+def bench(num_players: int, games: int, strategy: str, seed: int) -> dict:
+    rng = random.Random(seed)
+    wins = {faction: 0 for faction in Faction}
+    phase_totals = {"setup": 0.0, "night": 0.0, "day": 0.0}
+    days = 0
+
+    started = time.perf_counter()
+    for _ in range(games):
+        record = run_game(num_players, STRATEGIES[strategy], rng)
+        if record.winner is not None: wins[record.winner] += 1
+        days += record.days
+        for phase, seconds in record.timings.items():
+            phase_totals[phase] += seconds
+    elapsed = time.perf_counter() - started
+
+    # Measured on a separate run so tracing doesn't skew the timings above
+    tracemalloc.start()
+    run_game(num_players, STRATEGIES[strategy], random.Random(seed))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "players": num_players,
+        "games_per_sec": games / elapsed,
+        "phase_us": {phase: total / games * 1e6 for phase, total in phase_totals.items()},
+        "avg_days": days / games,
+        "village_win": wins[Faction.VILLAGE] / games,
+        "peak_kib": peak / 1024,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs headless Werewolf games and reports engine throughput.")
+    parser.add_argument("--players", type=int, nargs="+", default=[5, 10, 15, 30])
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--strategy", choices=STRATEGIES.keys(), default="random")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'players':>7} {'games/s':>9} {'setup us':>9} {'night us':>9} {'day us':>9} {'days':>5} {'village':>8} {'peak KiB':>9}")
+    for num_players in args.players:
+        r = bench(num_players, args.games, args.strategy, args.seed)
+        phase = r["phase_us"]
+        print(f"{r['players']:>7} {r['games_per_sec']:>9.0f} {phase['setup']:>9.1f} {phase['night']:>9.1f} {phase['day']:>9.1f} "
+              f"{r['avg_days']:>5.1f} {r['village_win']:>8.1%} {r['peak_kib']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
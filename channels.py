@@ -0,0 +1,142 @@
+import logging
+from dataclasses import dataclass, field
+
+import discord
+
+from guild_config import *
+from scheduler import RestCall, RestScheduler
+
+log = logging.getLogger(__name__)
+
+TableKey = tuple[int, int] # (guild ID, narrator control channel ID)
+
+# ============================================================
+# HANDLES
+# ============================================================
+
+@dataclass
+class TableHandles:
+    """One table's channels and narrator role, resolved from the guild cache."""
+    control: discord.TextChannel | None
+    voice: discord.VoiceChannel | None
+    narrator_role: discord.Role | None
+    text: dict[str, discord.TextChannel] = field(default_factory=dict) # TEXT_ID name -> channel
+    problems: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+@dataclass
+class ValidationReport:
+    tables: dict[TableKey, TableHandles]
+
+    @property
+    def problems(self) -> list[str]:
+        return [problem for handles in self.tables.values() for problem in handles.problems]
+
+    def __str__(self) -> str:
+        checked = sum(len(handles.text) + (handles.voice is not None) for handles in self.tables.values())
+        msg = f"{len(self.tables)} table(s), {checked} channels resolved, {len(self.problems)} problem(s)"
+        return "\n".join([msg, *(f"- {problem}" for problem in self.problems)])
+
+def _resolve(guild: discord.Guild, table: TableConfig) -> TableHandles:
+    control = guild.get_channel(table.narrator_control)
+    voice = guild.get_channel(table.voice)
+    handles = TableHandles(
+        control=control if isinstance(control, discord.TextChannel) else None,
+        voice=voice if isinstance(voice, discord.VoiceChannel) else None,
+        narrator_role=guild.get_role(table.narrator_role),
+    )
+    if handles.voice is None:
+        handles.problems.append(f"Voice channel {table.voice} not found or not a voice channel.")
+    if handles.narrator_role is None:
+        handles.problems.append(f"Narrator role {table.narrator_role} not found.")
+    for name, channel_id in table.text.items():
+        channel = guild.get_channel(channel_id)
+        if isinstance(channel, discord.TextChannel): handles.text[name] = channel
+        else: handles.problems.append(f"Text channel for {name} with ID {channel_id} not found or not a text channel.")
+
+    # Permissions the bot needs to run a game, checked against the cache without any REST calls
+    me = guild.me
+    if me is None: return handles
+    if not me.guild_permissions.manage_roles:
+        handles.problems.append("The bot can't manage roles, so it can't hand out channel access.")
+    for name, channel in handles.text.items():
+        permissions = channel.permissions_for(me)
+        if not (permissions.view_channel and permissions.send_messages):
+            handles.problems.append(f"The bot can't send messages in the {name} channel.")
+    return handles
+
+async def _probe(guild: discord.Guild, channel_id: int, handles: TableHandles):
+    try:
+        await guild.fetch_channel(channel_id)
+        handles.problems.append(f"Channel {channel_id} exists but isn't in the bot's cache; check its type.")
+    except discord.Forbidden:
+        handles.problems.append(f"Channel {channel_id} exists but the bot can't see it.")
+    except discord.NotFound:
+        pass # Already reported as not found
+    except discord.InvalidData:
+        handles.problems.append(f"Channel {channel_id} belongs to a different guild.")
+
+# ============================================================
+# CACHE
+# ============================================================
+
+class ChannelCache:
+    """
+    Resolves each table's channels and narrator role once and keeps the handles until a
+    channel or role they point at is updated or deleted, so commands don't re-resolve and
+    re-check them on every interaction.
+    """
+
+    def __init__(self):
+        self.handles: dict[TableKey, TableHandles] = {}
+        self.watched: dict[int, set[TableKey]] = {} # Channel or role ID -> tables using it
+
+    def get(self, guild: discord.Guild, table: TableConfig) -> TableHandles:
+        key = (guild.id, table.narrator_control)
+        handles = self.handles.get(key)
+        if handles is None:
+            handles = self.handles[key] = _resolve(guild, table)
+            for object_id in (*table.channel_ids, table.narrator_role):
+                self.watched.setdefault(object_id, set()).add(key)
+        return handles
+
+    def text(self, guild: discord.Guild, table: TableConfig, name: str) -> discord.TextChannel | None:
+        return self.get(guild, table).text.get(name)
+
+    def invalidate(self, object_id: int):
+        """Drops every table that uses this channel or role; they're resolved again on next use."""
+        for key in self.watched.pop(object_id, set()):
+            if self.handles.pop(key, None) is not None:
+                log.info(f"Channel handles for table {key[1]} invalidated by {object_id}")
+
+    def invalidate_table(self, table: TableConfig):
+        """Drops one table's handles, for when a channel or role its config names appears after they were resolved."""
+        if self.handles.pop((table.guild_id, table.narrator_control), None) is not None:
+            log.info(f"Channel handles for table {table.narrator_control} invalidated by a created channel or role")
+
+    async def validate(self, guilds: list[discord.Guild], tables: list[TableConfig], scheduler: RestScheduler) -> ValidationReport:
+        """
+        Resolves every table in its own guild, then fetches whatever the cache couldn't find all at
+        once, to tell deleted channels apart from ones the bot isn't allowed to see.
+        """
+        report = ValidationReport({})
+        calls = []
+        by_id = {guild.id: guild for guild in guilds}
+        for table in tables:
+            key = (table.guild_id, table.narrator_control)
+            guild = by_id.get(table.guild_id)
+            if guild is None:
+                report.tables[key] = TableHandles(None, None, None, problems=[f"Guild {table.guild_id} for table {table.narrator_control} isn't available to the bot."])
+                continue
+            self.invalidate(table.narrator_control)
+            handles = report.tables[key] = self.get(guild, table)
+            missing = [table.voice] if handles.voice is None else []
+            missing += [channel_id for name, channel_id in table.text.items() if name not in handles.text]
+            calls += [RestCall(f"fetch {channel_id}", ("channels", channel_id), lambda g=guild, c=channel_id, h=handles: _probe(g, c, h)) for channel_id in missing]
+        await scheduler.run(calls)
+        return report
+
+channel_cache = ChannelCache()
@@ -0,0 +1,41 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import discord
+from discord import app_commands
+
+log = logging.getLogger(__name__)
+
+SYNC_CACHE_PATH = Path("command_sync.json")
+
+def tree_hash(tree: app_commands.CommandTree, guild: discord.abc.Snowflake) -> str:
+    """Hashes the payload `tree.sync(guild=guild)` would upload, so unchanged trees can skip the call."""
+    payload = [command.to_dict(tree) for command in tree.get_commands(guild=guild)]
+    payload.sort(key=lambda command: (command.get("type", 1), command["name"]))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+class CommandSyncCache:
+    """Last synced command tree hash per guild, persisted across restarts."""
+
+    def __init__(self, path: Path = SYNC_CACHE_PATH):
+        self.path = path
+        self.hashes: dict[str, str] = {}
+        if path.exists():
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.hashes = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                log.exception(f"Unreadable command sync cache {path}, syncing everything")
+
+    def is_current(self, guild_id: int, digest: str) -> bool:
+        return self.hashes.get(str(guild_id)) == digest
+
+    def mark_synced(self, guild_id: int, digest: str):
+        self.hashes[str(guild_id)] = digest
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.hashes, f)
+        os.replace(tmp_path, self.path)
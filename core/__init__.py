@@ -0,0 +1,5 @@
+from core.game import DayResult, Member, NightAction, NightResult, Phase, Player, RoleEdit, Roster, VoteTally, WerewolfGame, parse_role_edits, plurality
+from core.events import EventLog
+from core.render import MESSAGE_LIMIT, SectionedMessage, paginate
+from core.simulate import STRATEGIES, GameRecord, InformedStrategy, RandomStrategy, Strategy, run_game
+from core.replay import ReplayMember, replay
@@ -0,0 +1,230 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+import numpy as np
+
+from game_config import *
+
+CACHE_PATH = Path("balance_cache.json")
+MODEL_VERSION = 1 # Bump when the simulation changes so stale estimates are discarded
+QUICK_GAMES = 5000 # Batch size for estimates shown in Discord; up to ~0.5 s for big lobbies, so run it in a thread
+
+# ============================================================
+# SIMULATION
+# ============================================================
+
+@dataclass(frozen=True)
+class BalanceEstimate:
+    village: float
+    werewolves: float
+    games: int
+
+    @property
+    def skew(self) -> float:
+        """Distance from a coin flip; 0 is perfectly balanced."""
+        return abs(self.village - 0.5)
+
+def _pick(rng: np.random.Generator, eligible: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Picks one eligible column per row uniformly. Returns (indices, whether the row had any candidate)."""
+    scores = np.where(eligible, rng.random(eligible.shape, dtype=np.float32), np.float32(-1))
+    return scores.argmax(axis=1), eligible.any(axis=1)
+
+def simulate(roles: list[Role], games: int = 20000, seed: int | None = None, max_days: int = 50) -> BalanceEstimate:
+    """
+    Plays `games` games of the given role multiset at once. Every game is a row in the same
+    arrays, so a night or day is a handful of vectorized operations over the whole batch, and
+    finished games are dropped from the arrays as soon as they end.
+    Players act like the informed headless strategy: seers share what they learn, the village
+    lynches revealed werewolves first and otherwise votes at random.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(roles)
+    codes = np.array([ROLE_INDEX[role] for role in roles])
+    table = rng.permuted(np.tile(codes, (games, 1)), axis=1)
+    
+    # Per-game state, one row per unfinished game
+    state = {role: table == ROLE_INDEX[role] for role in Role if role in roles}
+    state["alive"] = np.ones((games, n), dtype=bool)
+    state["known"] = np.zeros((games, n), dtype=bool)
+    state["lover"] = np.full((games, n), -1)
+    state["shield_left"] = np.full(games, Role.FLOWER_CHILD in roles)
+    state["shielded"] = np.full(games, -1) # Spared from the next lynch
+    village_wins = 0
+    finished = 0
+    
+    def kill(mask: np.ndarray):
+        # Lovers follow each other to the grave
+        alive, lover = state["alive"], state["lover"]
+        partners = np.where(mask, lover, -1)
+        game_idx, partner_idx = np.nonzero(partners >= 0)
+        alive[mask] = False
+        alive[game_idx, partners[game_idx, partner_idx]] = False
+        
+    def settle():
+        nonlocal village_wins, finished
+        alive, wolf = state["alive"], state[Role.WEREWOLF]
+        wolves = (alive & wolf).sum(axis=1)
+        others = (alive & ~wolf).sum(axis=1)
+        village = wolves == 0
+        done = village | (wolves >= others)
+        village_wins += int(village.sum())
+        finished += int(done.sum())
+        if done.any():
+            keep = ~done
+            for key in state:
+                state[key] = state[key][keep]
+            
+    for day in range(1, max_days + 1):
+        alive, known, wolf = state["alive"], state["known"], state[Role.WEREWOLF]
+        if len(alive) == 0: break
+        rows = np.arange(len(alive))
+        
+        # === Night ===
+        if day == 1 and Role.CUPID in roles:
+            first, _ = _pick(rng, alive)
+            second_pool = alive.copy()
+            second_pool[rows, first] = False
+            second, _ = _pick(rng, second_pool)
+            state["lover"][rows, first] = second
+            state["lover"][rows, second] = first
+            
+        safe = np.zeros_like(alive)
+        doomed = np.zeros_like(alive)
+        for role in (Role.FISHERMAN, Role.ANGEL):
+            if role not in state: continue
+            actor = state[role] & alive
+            target, ok = _pick(rng, alive & ~actor)
+            hit = actor.any(axis=1) & ok
+            if role == Role.FISHERMAN:
+                hooked = hit & wolf[rows, target]
+                doomed[hooked] |= actor[hooked]
+                hit &= ~hooked
+            safe[rows[hit], target[hit]] = True
+            
+        victim, ok = _pick(rng, alive & ~wolf)
+        hit = ok & ~safe[rows, victim]
+        doomed[rows[hit], victim[hit]] = True
+        
+        if Role.FORTUNE_TELLER in state:
+            seer = state[Role.FORTUNE_TELLER]
+            target, ok = _pick(rng, alive & ~known & ~seer)
+            seen = (seer & alive).any(axis=1) & ok
+            known[rows[seen], target[seen]] = True
+            
+        state["shielded"][:] = -1
+        if Role.FLOWER_CHILD in state:
+            target, ok = _pick(rng, alive)
+            use = (state[Role.FLOWER_CHILD] & alive).any(axis=1) & state["shield_left"] & ok
+            state["shielded"][use] = target[use]
+            state["shield_left"] &= ~use
+            
+        kill(doomed)
+        settle()
+        if len(state["alive"]) == 0: break
+        
+        # === Day ===
+        alive, known, wolf = state["alive"], state["known"], state[Role.WEREWOLF]
+        rows = np.arange(len(alive))
+        target, ok = _pick(rng, alive & known & wolf)
+        fallback, fallback_ok = _pick(rng, alive & ~(known & ~wolf))
+        lynched = np.where(ok, target, fallback)
+        hit = (ok | fallback_ok) & (lynched != state["shielded"])
+        lynch = np.zeros_like(alive)
+        lynch[rows[hit], lynched[hit]] = True
+        kill(lynch)
+        settle()
+        
+    village = village_wins / max(1, finished)
+    return BalanceEstimate(village=village, werewolves=1 - village, games=finished)
+
+# ============================================================
+# CACHE
+# ============================================================
+
+def composition_key(roles: list[Role]) -> str:
+    counts: dict[str, int] = {}
+    for role in roles:
+        counts[role.name] = counts.get(role.name, 0) + 1
+    return f"v{MODEL_VERSION}:{len(roles)}:" + ",".join(f"{name}={count}" for name, count in sorted(counts.items()))
+
+class BalanceCache:
+    """
+    Estimates keyed by player count and role multiset, persisted across restarts. Balance
+    searches run in worker threads, so the entries and the file are guarded by a lock; the
+    simulations themselves run outside it.
+    """
+
+    def __init__(self, path: Path = CACHE_PATH):
+        self.path = path
+        self.entries: dict[str, BalanceEstimate] | None = None
+        self.lock = threading.Lock()
+
+    def _load(self) -> dict[str, BalanceEstimate]:
+        # Callers hold self.lock
+        if self.entries is None:
+            self.entries = {}
+            if self.path.exists():
+                with open(self.path, encoding="utf-8") as f:
+                    self.entries = {key: BalanceEstimate(**value) for key, value in json.load(f).items() if key.startswith(f"v{MODEL_VERSION}:")}
+        return self.entries
+
+    def save(self):
+        with self.lock:
+            data = {key: asdict(value) for key, value in self._load().items()}
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+
+    def estimate(self, roles: list[Role], games: int = 20000, save: bool = True) -> BalanceEstimate:
+        """Returns the cached estimate, simulating first if it's missing or too small. `save=False` leaves writing to the caller."""
+        key = composition_key(roles)
+        with self.lock:
+            cached = self._load().get(key)
+        if cached is not None and cached.games >= games * 0.9: return cached
+        estimate = simulate(roles, games)
+        with self.lock:
+            self._load()[key] = estimate
+        if save: self.save()
+        return estimate
+
+    def peek(self, roles: list[Role], games: int = 0) -> BalanceEstimate | None:
+        """The cached estimate if it covers at least 90% of `games`, without simulating."""
+        with self.lock:
+            cached = self._load().get(composition_key(roles))
+        return cached if cached is not None and cached.games >= games * 0.9 else None
+
+balance_cache = BalanceCache()
+
+# ============================================================
+# COMPOSITION SEARCH
+# ============================================================
+
+def most_balanced(num_players: int, rng, budget: float = 0.5, games: int = QUICK_GAMES) -> list[Role]:
+    """
+    Samples candidate compositions around the default werewolf count and returns the one
+    whose estimated village win rate is closest to 50% found within `budget` seconds. Candidates
+    are simulated at QUICK_GAMES so the winner's estimate is already cached for display.
+    """
+    base_wolves = max(1, num_players // WOLF_RATIO)
+    deadline = time.perf_counter() + budget
+    best: tuple[float, list[Role]] | None = None
+    seen: set[str] = set()
+    for _ in range(200):
+        if best is not None and time.perf_counter() > deadline: break
+        wolves = max(1, base_wolves + rng.choice([-1, 0, 0, 1]))
+        slots = max(0, num_players - wolves)
+        picked = rng.sample(SPECIAL_POOL, rng.randint(0, min(slots, len(SPECIAL_POOL))))
+        roles = [Role.WEREWOLF] * wolves + picked + [Role.VILLAGER] * (slots - len(picked))
+        key = composition_key(roles)
+        if key in seen or len(roles) != num_players: continue
+        seen.add(key)
+        estimate = balance_cache.estimate(roles, games, save=False)
+        if best is None or estimate.skew < best[0]:
+            best = (estimate.skew, roles)
+    balance_cache.save() # Once per search rather than once per candidate
+    return best[1] if best is not None else []
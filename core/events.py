@@ -0,0 +1,30 @@
+from typing import Any
+
+LOG_VERSION = 1
+
+class EventLog:
+    """
+    Append-only record of every state change in a game, in the order it happened. Each event
+    is a compact list, `[kind, *args]`, holding only JSON types so logs can be archived as-is.
+    Together with the game's seed it is enough to rebuild the game exactly; see core.replay.
+    """
+
+    def __init__(self, seed: int, narrator_role: int | None = None, events: list[list[Any]] | None = None):
+        self.seed = seed
+        self.narrator_role = narrator_role
+        self.events: list[list[Any]] = events if events is not None else []
+
+    def record(self, kind: str, *args: Any):
+        self.events.append([kind, *args])
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def to_dict(self) -> dict:
+        return {"version": LOG_VERSION, "seed": self.seed, "narrator_role": self.narrator_role, "events": self.events}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EventLog":
+        if data.get("version") != LOG_VERSION:
+            raise ValueError(f"Unsupported event log version {data.get('version')}")
+        return cls(data["seed"], data["narrator_role"], [list(event) for event in data["events"]])
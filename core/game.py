@@ -0,0 +1,602 @@
+import random
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Protocol
+
+from game_config import *
+from core.events import EventLog
+from core.render import SectionedMessage
+from core.balance import QUICK_GAMES, BalanceEstimate, balance_cache, most_balanced
+
+# ============================================================
+# MODEL DEFINITIONS
+# ============================================================
+
+class Phase(Enum):
+    LOBBY = "Lobby"
+    ROLE_ASSIGNMENT = "Role Assignment"
+    NIGHT = "Night"
+    DAY = "Day"
+    ENDED = "Ended"
+
+class Member(Protocol):
+    """The parts of a discord.Member the model relies on."""
+    id: int
+    display_name: str
+    def get_role(self, role_id: int, /) -> Any: ...
+
+@dataclass(slots=True)
+class Player:
+    id: int
+    name: str
+    role: Role | None = None
+    dead: bool = False
+    lover_id: int | None = None
+    
+@dataclass(slots=True)
+class NightAction:
+    actor_id: int
+    role: Role
+    targets: tuple[int, ...]
+
+@dataclass
+class NightResult:
+    deaths: list[int] = field(default_factory=list)
+    revealed: dict[int, tuple[int, Role]] = field(default_factory=dict) # Actor ID -> (target ID, target role)
+
+@dataclass
+class DayResult:
+    lynched: int | None = None
+    shielded: bool = False
+    deaths: list[int] = field(default_factory=list)
+
+def plurality(votes: dict[int, int], rng: random.Random | None = None) -> int | None:
+    """Returns the most voted target. Ties are broken by `rng` if given, otherwise nobody wins."""
+    counts: dict[int, int] = {}
+    for target in votes.values():
+        counts[target] = counts.get(target, 0) + 1
+    if not counts: return None
+    top = max(counts.values())
+    leaders = [target for target, count in counts.items() if count == top]
+    if len(leaders) == 1: return leaders[0]
+    return rng.choice(leaders) if rng is not None else None
+
+@dataclass(frozen=True, slots=True)
+class RoleEdit:
+    action: str # "add", "remove" or "replace"
+    role: Role
+    with_role: Role | None = None
+
+_EDIT_PATTERN = re.compile(r"^(?:(?P<sign>[+-])\s*(?P<count>\d+)?\s*(?P<role>.+)|(?P<old>.+?)\s*>\s*(?P<new>.+))$")
+
+def _lookup_role(name: str) -> Role:
+    role = ROLE_LOOKUP.get(" ".join(name.lower().replace("_", " ").split()))
+    if role is None: raise ValueError(f"Unknown role {name.strip()!r}.")
+    return role
+
+def parse_role_edits(text: str, num_players: int) -> list[RoleEdit]:
+    """
+    Parses a comma-separated batch such as "+2 Werewolf, -Cupid, Angel > Sheriff". A count can't
+    exceed `num_players`, since no game holds more of a role than it has players. Raises
+    ValueError naming the first item it can't read.
+    """
+    edits = []
+    for item in filter(None, (item.strip() for item in text.split(","))):
+        match = _EDIT_PATTERN.match(item)
+        if match is None: raise ValueError(f"Can't read {item!r}; use +Role, -Role or Old > New.")
+        if match["sign"] is not None:
+            edit = RoleEdit("add" if match["sign"] == "+" else "remove", _lookup_role(match["role"]))
+            count = int(match["count"] or 1)
+            if count > num_players: raise ValueError(f"Can't apply {item!r}; the game only has {num_players} players.")
+            edits += [edit] * count
+        else:
+            edits.append(RoleEdit("replace", _lookup_role(match["old"]), _lookup_role(match["new"])))
+    return edits
+
+def _apply_edit(counts: Counter, edit: RoleEdit) -> str:
+    """Applies one edit to `counts` if the composition allows it. Every edit keeps the total, trading with Villagers."""
+    role, with_role = edit.role, edit.with_role
+    if edit.action == "add":
+        if role == Role.VILLAGER: return "Cannot add Villager role directly. Remove a role instead."
+        if counts[Role.VILLAGER] == 0: return f"Failed to add role {role.value}: no Villager roles left to replace."
+        limit = ROLES[role].max_count
+        if limit is not None and counts[role] >= limit: return f"Failed to add role {role.value}: at most {limit} per game."
+        counts[Role.VILLAGER] -= 1
+        counts[role] += 1
+        return f"Added role {role.value}."
+
+    if role == Role.VILLAGER: return "Cannot remove Villager role directly. Add a role instead."
+    if counts[role] == 0: return f"Failed to remove role {role.value}: role not in game."
+    if role == Role.WEREWOLF and counts[role] == 1: return f"Failed to remove role {role.value}: cannot remove last Werewolf."
+    if edit.action == "replace" and with_role is not None and with_role != Role.VILLAGER:
+        limit = ROLES[with_role].max_count
+        if limit is not None and counts[with_role] >= limit: return f"Failed to add role {with_role.value}: at most {limit} per game."
+        counts[role] -= 1
+        counts[with_role] += 1
+        return f"Replaced role {role.value} with {with_role.value}."
+    counts[role] -= 1
+    counts[Role.VILLAGER] += 1
+    return f"Removed role {role.value}."
+
+class VoteTally:
+    """
+    A day's lynch vote. Tallies are adjusted on every cast, so a vote or a change of mind costs
+    O(1) no matter how many players there are.
+    """
+    
+    def __init__(self, weights: dict[int, int]):
+        self.weights = weights # Voter ID -> how much their vote counts
+        self.votes: dict[int, int] = {} # Voter ID -> target ID
+        self.tallies: dict[int, int] = {} # Target ID -> weighted votes
+        self.version = 0 # Bumped on change, for debounced rendering
+        self.closed = False
+        self.outcome: int | None = None # Set when the vote closes
+        
+    def cast(self, voter_id: int, target_id: int | None) -> bool:
+        """Records or changes a vote. A target of None withdraws it."""
+        if self.closed or voter_id not in self.weights: return False
+        previous = self.votes.get(voter_id)
+        if previous == target_id: return True
+        weight = self.weights[voter_id]
+        if previous is not None:
+            self.tallies[previous] -= weight
+            if self.tallies[previous] == 0: del self.tallies[previous]
+        if target_id is None:
+            del self.votes[voter_id]
+        else:
+            self.votes[voter_id] = target_id
+            self.tallies[target_id] = self.tallies.get(target_id, 0) + weight
+        self.version += 1
+        return True
+        
+    def leaders(self) -> list[int]:
+        if not self.tallies: return []
+        top = max(self.tallies.values())
+        return [target for target, count in self.tallies.items() if count == top]
+        
+    def result(self, rng: random.Random | None = None) -> int | None:
+        """The lynched player. Ties are broken by `rng` if given, otherwise nobody is lynched."""
+        leaders = self.leaders()
+        if len(leaders) == 1: return leaders[0]
+        return rng.choice(leaders) if rng is not None and leaders else None
+
+class Roster:
+    """
+    Everyone taking part in a game, indexed by user ID. Dicts preserve insertion order,
+    so listings still show people in the order they joined.
+    """
+    
+    def __init__(self, narrator_role: int | None = None, log: EventLog | None = None):
+        self.narrator_role = narrator_role
+        self.log = log
+        self.members: dict[int, Member] = {} # Everyone in the voice call
+        self.narrators: dict[int, Member] = {}
+        self.spectators: dict[int, Member] = {}
+        self.players: dict[int, Player] = {}
+        self.dummies: dict[int, Player] = {}
+        self.debug_narrator: Member | None = None
+        self.locked = False # Set once the game starts; the roster changes only in the lobby
+        self.versions = {"narrators": 0, "spectators": 0, "players": 0} # Bumped on change, for render caching
+        
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self.players or user_id in self.narrators or user_id in self.spectators
+        
+    def _touch(self, *kinds: str):
+        for kind in kinds:
+            self.versions[kind] += 1
+            
+    def _record(self, kind: str, member: Member | None = None, *args: Any):
+        # Members are logged with their narrator status, which replays can't look up
+        if self.log is None: return
+        if member is None: self.log.record(kind, *args)
+        else: self.log.record(kind, member.id, member.display_name, self.narrator_role is not None and member.get_role(self.narrator_role) is not None, *args)
+        
+    def is_narrator(self, member: Member) -> bool:
+        if self.debug_narrator is not None and member.id == self.debug_narrator.id: return True
+        return self.narrator_role is not None and member.get_role(self.narrator_role) is not None
+        
+    def _place(self, member: Member):
+        """Files a member under narrators, spectators or players, keeping any existing Player record."""
+        self._touch("narrators", "spectators", "players")
+        if self.is_narrator(member):
+            self.narrators[member.id] = member
+            self.players.pop(member.id, None)
+            self.spectators.pop(member.id, None)
+        else:
+            self.narrators.pop(member.id, None)
+            if member.id in self.spectators:
+                self.players.pop(member.id, None)
+            elif member.id not in self.players:
+                self.players[member.id] = Player(member.id, member.display_name)
+                
+    def join(self, member: Member):
+        if self.locked: return
+        self._record("join", member)
+        self.members[member.id] = member
+        self._place(member)
+        
+    def leave(self, user_id: int):
+        if self.locked: return
+        self._record("leave", None, user_id)
+        self._touch("narrators", "players")
+        self.members.pop(user_id, None)
+        self.players.pop(user_id, None)
+        if self.debug_narrator is None or self.debug_narrator.id != user_id:
+            self.narrators.pop(user_id, None)
+            
+    def update(self, member: Member):
+        if self.locked: return
+        if member.id in self.members or (self.debug_narrator is not None and member.id == self.debug_narrator.id):
+            self._record("update", member)
+            self._place(member)
+            
+    def sync(self, members: list[Member]):
+        current = {m.id: m for m in members}
+        for user_id in self.members.keys() - current.keys():
+            self.leave(user_id)
+        for member in current.values():
+            if member.id not in self.members: self.join(member)
+            
+    def add_spectator(self, member: Member) -> bool:
+        if self.locked or member.id in self.spectators or member.id in self.narrators: return False
+        self._record("spectate", member)
+        self.spectators[member.id] = member
+        self.players.pop(member.id, None)
+        self._touch("spectators", "players")
+        return True
+        
+    def remove_spectator(self, member: Member) -> bool:
+        if self.locked or member.id not in self.spectators or member.id in self.narrators: return False
+        self._record("unspectate", member)
+        del self.spectators[member.id]
+        self._touch("spectators")
+        if member.id in self.members: self._place(member)
+        return True
+        
+    def set_debug_narrator(self, member: Member) -> bool:
+        if self.locked: return False
+        self._record("debug_narrator", member)
+        previous, self.debug_narrator = self.debug_narrator, member
+        if previous is not None:
+            self.narrators.pop(previous.id, None)
+            if previous.id in self.members: self._place(previous)
+        self._place(member)
+        return True
+        
+    def set_dummies(self, count: int) -> bool:
+        if self.locked: return False
+        self._record("dummies", None, count)
+        for user_id in self.dummies:
+            self.players.pop(user_id, None)
+        self.dummies = {-(i+1): Player(id=-(i+1), name=f"Dummy {i+1}") for i in range(count)}
+        self.players.update(self.dummies)
+        self._touch("players")
+        return True
+
+class WerewolfGame:
+    roster: Roster
+    roles: list[Role]
+    
+    def __init__(self, players: list[Member], narrator_role: int | None = None, seed: int | None = None):
+        # Every random choice in the game comes from its own seeded generator, so the
+        # event log and seed are enough to reproduce it
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.rng = random.Random(self.seed)
+        self.log = EventLog(self.seed, narrator_role)
+        self.roster = Roster(narrator_role, self.log)
+        self.roles = []
+        self.roles_version = 0
+        self.roster.sync(players)
+        
+        self.phase = Phase.LOBBY
+        self.day = 0
+        self.shielded: int | None = None # Protected from the next lynch by the Flower Child
+        self.flower_child_used = False
+        self.winner: Faction | None = None
+        self.vote: VoteTally | None = None
+        
+        versions = self.roster.versions
+        self.lobby = SectionedMessage()
+        self.lobby.add("narrators", self._narrators_section, lambda: versions["narrators"])
+        self.lobby.add("players", self._players_section, lambda: versions["players"])
+        self.lobby.add("spectators", self._spectators_section, lambda: versions["spectators"])
+        self.assignments = SectionedMessage()
+        self.assignments.add("roles", self._roles_section, lambda: (versions["players"], self.roles_version))
+        self.assignments.add("counts", self._counts_section, lambda: (versions["players"], self.roles_version, self.balance_estimate() is not None))
+    
+    @property
+    def players(self) -> list[Player]:
+        return list(self.roster.players.values())
+        
+    @property
+    def narrators(self) -> list[Member]:
+        return list(self.roster.narrators.values())
+        
+    @property
+    def spectators(self) -> list[Member]:
+        return list(self.roster.spectators.values())
+    
+    def add_spectator(self, member: Member) -> bool:
+        return self.roster.add_spectator(member)
+    
+    def remove_spectator(self, member: Member) -> bool:
+        return self.roster.remove_spectator(member)
+            
+    def set_players(self, members: list[Member]):
+        self.roster.sync(members)
+        
+    # === Snapshots ===
+    
+    def to_state(self) -> dict:
+        """A compact, JSON-friendly copy of everything needed to resume the game after lobby."""
+        return {
+            "phase": self.phase.name,
+            "day": self.day,
+            "narrator_role": self.roster.narrator_role,
+            "narrators": list(self.roster.narrators),
+            "spectators": list(self.roster.spectators),
+            "players": [[p.id, p.name, p.role.name if p.role else None, p.dead, p.lover_id] for p in self.roster.players.values()],
+            "roles": [role.name for role in self.roles],
+            "shielded": self.shielded,
+            "flower_child_used": self.flower_child_used,
+            "winner": self.winner.name if self.winner else None,
+            "rng": list(self.rng.getstate()[1:]),
+            "log": self.log.to_dict(),
+        }
+    
+    @classmethod
+    def from_state(cls, state: dict, resolve: Callable[[int], Member | None]) -> "WerewolfGame":
+        """Rebuilds a game from `to_state`. `resolve` maps user IDs back to members; unknown IDs are dropped."""
+        log = EventLog.from_dict(state["log"])
+        game = cls([], state["narrator_role"], log.seed)
+        game.log = game.roster.log = log
+        version = game.rng.getstate()[0]
+        game.rng.setstate((version, tuple(state["rng"][0]), state["rng"][1]))
+        roster = game.roster
+        for user_id in state["narrators"]:
+            member = resolve(user_id)
+            if member is not None: roster.narrators[user_id] = member
+        for user_id in state["spectators"]:
+            member = resolve(user_id)
+            if member is not None: roster.spectators[user_id] = member
+        for user_id, name, role, dead, lover_id in state["players"]:
+            player = Player(user_id, name, Role[role] if role else None, dead, lover_id)
+            roster.players[user_id] = player
+            if user_id < 0: roster.dummies[user_id] = player
+        roster._touch("narrators", "spectators", "players")
+        game.roles = [Role[name] for name in state["roles"]]
+        game.roles_version += 1
+        game.phase = Phase[state["phase"]]
+        roster.locked = game.phase != Phase.LOBBY
+        game.day = state["day"]
+        game.shielded = state["shielded"]
+        game.flower_child_used = state["flower_child_used"]
+        game.winner = Faction[state["winner"]] if state["winner"] else None
+        return game
+        
+    def start(self):
+        """Closes the lobby. From here on the players are fixed, so roles stay dealt one per player."""
+        self.log.record("start")
+        self.phase = Phase.ROLE_ASSIGNMENT
+        self.roster.locked = True
+        
+    def setup_roles(self, balanced: bool = False, budget: float = 0.5, composition: list[Role] | None = None):
+        """
+        Picks a role list for the current players. `balanced` searches for the fairest composition for
+        up to `budget` seconds. `composition` skips picking altogether; replays use it to repeat a setup.
+        """
+        # The balance search makes a time-dependent number of draws, so it gets a stream of its own
+        picker = random.Random(self.rng.getrandbits(64))
+        num_players = len(self.players)
+        if composition is not None:
+            self.roles = list(composition)
+        elif balanced and num_players > 0:
+            self.roles = most_balanced(num_players, picker, budget)
+        else:
+            # One pass however big the lobby: wolves, a draw of specials without replacement, then Villagers
+            num_werewolves = max(1, num_players // WOLF_RATIO)
+            specials = picker.sample(SPECIAL_POOL, min(len(SPECIAL_POOL), max(0, num_players - num_werewolves)))
+            self.roles = [Role.WEREWOLF] * num_werewolves + specials
+            self.roles += [Role.VILLAGER] * (num_players - len(self.roles))
+        self.log.record("setup", [role.name for role in self.roles])
+        self._deal()
+        
+    def _deal(self):
+        self.rng.shuffle(self.roles)
+        for i, player in enumerate(self.players):
+            player.role = self.roles[i]
+        self.roles_version += 1
+        
+    def shuffle_roles(self):
+        self.log.record("shuffle")
+        self._deal()
+        
+    def edit_roles(self, edits: list[RoleEdit]) -> list[str]:
+        """
+        Applies a batch of edits to the role counts in order, skipping any that would break the
+        composition, then deals once. Only allowed before roles are assigned, since dealing again
+        would hand everyone, the dead included, a new role. Returns one line per edit saying what happened.
+        """
+        if self.phase != Phase.ROLE_ASSIGNMENT: return ["Cannot modify roles: not in role selection stage."]
+        counts = Counter(self.roles)
+        results = [_apply_edit(counts, edit) for edit in edits]
+        if counts != Counter(self.roles):
+            self.log.record("edit_roles", [[edit.action, edit.role.name, edit.with_role.name if edit.with_role else None] for edit in edits])
+            self.roles = list(counts.elements())
+            self._deal()
+        return results
+    
+    def _narrators_section(self) -> str:
+        msg = f"*Narrators ({len(self.roster.narrators)}/1):*\n"
+        msg += f"{'\n'.join([member.display_name for member in self.roster.narrators.values()]) if self.roster.narrators else 'None'}\n\n"
+        return msg
+    
+    def _players_section(self) -> str:
+        msg = f"*Players ({len(self.roster.players)}/{MIN_PLAYERS}):*\n"
+        msg += f"{'\n'.join([player.name for player in self.roster.players.values()]) if self.roster.players else 'None'}\n\n"
+        return msg
+        
+    def _spectators_section(self) -> str:
+        if not self.roster.spectators: return ""
+        msg = "*Spectators:*\n"
+        msg += f"{'\n'.join([member.display_name for member in self.roster.spectators.values()])}\n\n"
+        return msg
+        
+    def _roles_section(self) -> str:
+        return "".join(f"- {player.name}: {player.role.value}\n" for player in self.roster.players.values() if player.role is not None)
+        
+    def balance_estimate(self) -> BalanceEstimate | None:
+        """The cached estimate for the current roles. Rendering never simulates; callers fill the cache off the event loop."""
+        return balance_cache.peek(self.roles, QUICK_GAMES) if self.roles else None
+    
+    def _counts_section(self) -> str:
+        msg = f"\n*Werewolves: {self.roles.count(Role.WEREWOLF)}/{len(self.roster.players)}*"
+        if self.roles:
+            estimate = self.balance_estimate()
+            if estimate is None: msg += "\n*Estimating balance...*"
+            else: msg += f"\n*Estimated balance: Village {estimate.village:.0%} / Werewolves {estimate.werewolves:.0%}*"
+        return msg
+        
+    def lobby_pages(self, started=False) -> list[str]:
+        footer = "Press 'Start Game' when ready." if not started else "*The game has started!*"
+        return self.lobby.pages("**Werewolf**\n", footer)
+        
+    def role_pages(self, started=False) -> list[str]:
+        header = "**Werewolf - Role Assignment**\n" if not started else "**Werewolf - Roles Assigned**\n"
+        footer = "\n*Use '/role' to adjust role counts.*" if not started else ""
+        return self.assignments.pages(header, footer)
+        
+    def lobby_msg(self, started=False) -> str:
+        return "".join(self.lobby_pages(started))
+        
+    def role_msg(self, started=False) -> str:
+        return "".join(self.role_pages(started))
+    
+    # === Rules ===
+    
+    def alive(self) -> list[Player]:
+        return [player for player in self.roster.players.values() if not player.dead]
+    
+    def night_roles(self) -> dict[Role, list[Player]]:
+        """The living players who act tonight, grouped by role in resolution order."""
+        acting: dict[Role, list[Player]] = {}
+        for player in self.alive():
+            if player.role in NIGHT_ORDER:
+                acting.setdefault(player.role, []).append(player)
+        if self.day > 1: acting.pop(Role.CUPID, None)
+        if self.flower_child_used: acting.pop(Role.FLOWER_CHILD, None)
+        if not any(player.dead for player in self.roster.players.values()): acting.pop(Role.UNDERTAKER, None)
+        return {role: acting[role] for role in NIGHT_ORDER if role in acting}
+    
+    def begin_night(self):
+        self.log.record("begin_night")
+        self.phase = Phase.NIGHT
+        self.day += 1
+        
+    def resolve_night(self, actions: list[NightAction], break_ties: bool = False) -> NightResult:
+        """Applies the night's actions in NIGHT_ORDER. A tied werewolf vote kills nobody unless `break_ties`, which draws from the game's RNG."""
+        self.log.record("night", [[a.actor_id, a.role.name, list(a.targets)] for a in actions], break_ties)
+        result = NightResult()
+        players = self.roster.players
+        by_role: dict[Role, list[NightAction]] = {}
+        for action in actions:
+            actor = players.get(action.actor_id)
+            if actor is None or actor.dead or actor.role != action.role: continue
+            dead_target = action.role == Role.UNDERTAKER
+            if not action.targets or any(t not in players or players[t].dead != dead_target for t in action.targets): continue
+            by_role.setdefault(action.role, []).append(action)
+            
+        safe: set[int] = set()
+        doomed: list[int] = []
+        for role in NIGHT_ORDER:
+            for action in by_role.get(role, []):
+                target = action.targets[0]
+                if role == Role.CUPID and len(action.targets) >= 2 and self.day == 1:
+                    first, second = players[action.targets[0]], players[action.targets[1]]
+                    if first.id != second.id:
+                        first.lover_id, second.lover_id = second.id, first.id
+                elif role == Role.FISHERMAN:
+                    if players[target].role == Role.WEREWOLF: doomed.append(action.actor_id)
+                    else: safe.add(target)
+                elif role == Role.ANGEL:
+                    safe.add(target)
+                elif role == Role.FORTUNE_TELLER or role == Role.UNDERTAKER:
+                    result.revealed[action.actor_id] = (target, players[target].role) # type: ignore
+                elif role == Role.FLOWER_CHILD and not self.flower_child_used:
+                    self.shielded = target
+                    self.flower_child_used = True
+            if role == Role.WEREWOLF and Role.WEREWOLF in by_role:
+                victim = plurality({a.actor_id: a.targets[0] for a in by_role[Role.WEREWOLF]}, self.rng if break_ties else None)
+                if victim is not None and victim not in safe: doomed.append(victim)
+                
+        for user_id in doomed:
+            self._kill(user_id, result.deaths)
+        self.phase = Phase.DAY
+        self.check_winner()
+        return result
+    
+    def resolve_lynch(self, target_id: int | None) -> DayResult:
+        self.log.record("lynch", target_id)
+        result = DayResult()
+        if target_id is not None and target_id in self.roster.players and not self.roster.players[target_id].dead:
+            if target_id == self.shielded:
+                result.shielded = True
+            else:
+                result.lynched = target_id
+                self._kill(target_id, result.deaths)
+        self.shielded = None
+        self.check_winner()
+        return result
+    
+    def open_vote(self) -> VoteTally:
+        """Starts the day's lynch vote among the living. The Sheriff's vote counts SHERIFF_VOTE_WEIGHT times."""
+        self.log.record("open_vote")
+        self.vote = VoteTally({player.id: SHERIFF_VOTE_WEIGHT if player.role == Role.SHERIFF else 1 for player in self.alive()})
+        return self.vote
+    
+    def cast_vote(self, voter_id: int, target_id: int | None) -> bool:
+        if self.vote is None: return False
+        if target_id is not None and (target_id not in self.roster.players or self.roster.players[target_id].dead): return False
+        if not self.vote.cast(voter_id, target_id): return False
+        self.log.record("vote", voter_id, target_id)
+        return True
+    
+    def close_vote(self, break_ties: bool = False) -> int | None:
+        """Ends the vote and returns who it lynches, without lynching them; see resolve_lynch."""
+        if self.vote is None: return None
+        self.log.record("close_vote", break_ties)
+        self.vote.closed = True
+        self.vote.outcome = self.vote.result(self.rng if break_ties else None)
+        return self.vote.outcome
+    
+    def vote_msg(self, final: bool = False) -> str:
+        vote, players = self.vote, self.roster.players
+        if vote is None: return ""
+        msg = f"**Day {self.day} - Lynch Vote** ({len(vote.votes)}/{len(vote.weights)} voted)\n"
+        for target, count in sorted(vote.tallies.items(), key=lambda item: -item[1])[:40]:
+            msg += f"- {players[target].name}: {count}\n"
+        if not vote.tallies: msg += "*No votes yet.*\n"
+        if final:
+            msg += f"\n**{players[vote.outcome].name} is lynched.**" if vote.outcome is not None else "\n**Nobody is lynched.**"
+        else:
+            if any(weight > 1 for weight in vote.weights.values()): msg += f"\n*The Sheriff's vote counts {SHERIFF_VOTE_WEIGHT} times.*"
+            msg += "\n*Pick a player below. You can change your vote until the narrator closes it.*"
+        return msg
+    
+    def _kill(self, user_id: int, deaths: list[int]):
+        player = self.roster.players[user_id]
+        if player.dead: return
+        player.dead = True
+        deaths.append(user_id)
+        if player.lover_id is not None:
+            self._kill(player.lover_id, deaths)
+            
+    def check_winner(self) -> Faction | None:
+        alive = self.alive()
+        wolves = sum(1 for player in alive if player.role is not None and FACTION[player.role] == Faction.WEREWOLVES)
+        if wolves == 0: self.winner = Faction.VILLAGE
+        elif wolves >= len(alive) - wolves: self.winner = Faction.WEREWOLVES
+        if self.winner is not None: self.phase = Phase.ENDED
+        return self.winner
@@ -0,0 +1,66 @@
+from typing import Callable, Hashable
+
+MESSAGE_LIMIT = 2000
+
+# ============================================================
+# RENDERING
+# ============================================================
+
+class Section:
+    __slots__ = ("name", "render", "version", "cached_version", "text")
+
+    def __init__(self, name: str, render: Callable[[], str], version: Callable[[], Hashable]):
+        self.name = name
+        self.render = render
+        self.version = version
+        self.cached_version: Hashable = object()
+        self.text = ""
+
+    def refresh(self) -> bool:
+        """Re-renders the section if its version changed. Returns whether it did."""
+        version = self.version()
+        if version == self.cached_version: return False
+        self.cached_version = version
+        self.text = self.render()
+        return True
+
+class SectionedMessage:
+    """
+    A message built from independently cached sections. Each section is only re-rendered
+    when its version stamp changes, and the output is split into pages that fit Discord's
+    message length limit.
+    """
+
+    def __init__(self, limit: int = MESSAGE_LIMIT):
+        self.limit = limit
+        self.sections: list[Section] = []
+        self.cached_pages: list[str] = []
+        self.cached_frame: tuple[str, str] | None = None
+
+    def add(self, name: str, render: Callable[[], str], version: Callable[[], Hashable]):
+        self.sections.append(Section(name, render, version))
+
+    def pages(self, header: str = "", footer: str = "") -> list[str]:
+        changed = [section.refresh() for section in self.sections]
+        if any(changed) or self.cached_frame != (header, footer):
+            self.cached_frame = (header, footer)
+            self.cached_pages = paginate([header, *(section.text for section in self.sections), footer], self.limit)
+        return self.cached_pages
+
+def paginate(fragments: list[str], limit: int = MESSAGE_LIMIT) -> list[str]:
+    pages = [""]
+    for fragment in fragments:
+        if len(pages[-1]) + len(fragment) <= limit:
+            pages[-1] += fragment
+            continue
+        # Fall back to splitting the fragment by line, then by hard length for oversized lines
+        for line in fragment.splitlines(keepends=True):
+            while len(line) > limit:
+                if pages[-1]: pages.append("")
+                pages[-1] = line[:limit]
+                line = line[limit:]
+                pages.append("")
+            if len(pages[-1]) + len(line) > limit:
+                pages.append("")
+            pages[-1] += line
+    return [page for page in pages if page] or [""]
@@ -0,0 +1,58 @@
+from dataclasses import dataclass
+from typing import Any
+
+from game_config import *
+from core.events import EventLog
+from core.game import NightAction, RoleEdit, WerewolfGame
+
+# ============================================================
+# REPLAY
+# ============================================================
+
+@dataclass
+class ReplayMember:
+    """Stands in for the discord.Member behind a logged event."""
+    id: int
+    display_name: str
+    narrator: bool = False
+
+    def get_role(self, role_id: int, /) -> Any:
+        return True if self.narrator else None
+
+def replay(log: EventLog | dict, until: int | None = None) -> WerewolfGame:
+    """
+    Rebuilds a game by applying its logged events to a fresh game with the same seed. No
+    rendering or Discord calls happen along the way, so a replay costs tens of microseconds per
+    event. `until` stops after that many events, to inspect the game at any point.
+    """
+    if isinstance(log, dict): log = EventLog.from_dict(log)
+    game = WerewolfGame([], narrator_role=log.narrator_role, seed=log.seed)
+    members: dict[int, ReplayMember] = {}
+
+    def member(user_id: int, name: str, narrator: bool) -> ReplayMember:
+        m = members.get(user_id)
+        if m is None: m = members[user_id] = ReplayMember(user_id, name)
+        m.display_name, m.narrator = name, narrator
+        return m
+
+    roster = game.roster
+    for kind, *args in log.events[:until]:
+        if kind == "join": roster.join(member(*args))
+        elif kind == "leave": roster.leave(args[0])
+        elif kind == "update": roster.update(member(*args))
+        elif kind == "spectate": roster.add_spectator(member(*args))
+        elif kind == "unspectate": roster.remove_spectator(member(*args))
+        elif kind == "debug_narrator": roster.set_debug_narrator(member(*args))
+        elif kind == "dummies": roster.set_dummies(args[0])
+        elif kind == "start": game.start()
+        elif kind == "setup": game.setup_roles(composition=[Role[name] for name in args[0]])
+        elif kind == "shuffle": game.shuffle_roles()
+        elif kind == "edit_roles": game.edit_roles([RoleEdit(action, Role[role], Role[with_role] if with_role else None) for action, role, with_role in args[0]])
+        elif kind == "begin_night": game.begin_night()
+        elif kind == "night": game.resolve_night([NightAction(actor, Role[role], tuple(targets)) for actor, role, targets in args[0]], args[1])
+        elif kind == "open_vote": game.open_vote()
+        elif kind == "vote": game.cast_vote(*args)
+        elif kind == "close_vote": game.close_vote(args[0])
+        elif kind == "lynch": game.resolve_lynch(args[0])
+        else: raise ValueError(f"Unknown event {kind!r}")
+    return game
@@ -0,0 +1,110 @@
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Protocol
+
+from game_config import *
+from core.game import DayResult, NightAction, NightResult, Player, WerewolfGame, plurality
+
+# ============================================================
+# STRATEGIES
+# ============================================================
+
+class Strategy(Protocol):
+    def night_targets(self, game: WerewolfGame, player: Player, rng: random.Random) -> tuple[int, ...] | None: ...
+    def vote(self, game: WerewolfGame, player: Player, rng: random.Random) -> int | None: ...
+    def observe(self, game: WerewolfGame, result: NightResult | DayResult): ...
+
+class RandomStrategy:
+    """Picks uniformly among legal targets. Werewolves never target their own pack."""
+
+    def night_targets(self, game: WerewolfGame, player: Player, rng: random.Random) -> tuple[int, ...] | None:
+        if player.role == Role.UNDERTAKER:
+            candidates = [p.id for p in game.roster.players.values() if p.dead]
+        elif player.role == Role.WEREWOLF:
+            candidates = [p.id for p in game.alive() if p.role != Role.WEREWOLF]
+        else:
+            candidates = [p.id for p in game.alive() if p.id != player.id]
+        if player.role == Role.CUPID:
+            return tuple(rng.sample(candidates, 2)) if len(candidates) >= 2 else None
+        return (rng.choice(candidates),) if candidates else None
+
+    def vote(self, game: WerewolfGame, player: Player, rng: random.Random) -> int | None:
+        candidates = [p.id for p in game.alive() if p.id != player.id and not (player.role == Role.WEREWOLF and p.role == Role.WEREWOLF)]
+        return rng.choice(candidates) if candidates else None
+
+    def observe(self, game: WerewolfGame, result: NightResult | DayResult):
+        pass
+
+class InformedStrategy(RandomStrategy):
+    """
+    Seers share what they learn: the village votes out revealed werewolves first and never
+    votes for a player revealed as a villager.
+    """
+
+    def __init__(self):
+        self.known: dict[int, Role] = {}
+
+    def vote(self, game: WerewolfGame, player: Player, rng: random.Random) -> int | None:
+        if player.role == Role.WEREWOLF: return super().vote(game, player, rng)
+        alive = [p for p in game.alive() if p.id != player.id]
+        wolves = [p.id for p in alive if self.known.get(p.id) == Role.WEREWOLF]
+        if wolves: return wolves[0]
+        unknown = [p.id for p in alive if p.id not in self.known]
+        return rng.choice(unknown) if unknown else super().vote(game, player, rng)
+
+    def observe(self, game: WerewolfGame, result: NightResult | DayResult):
+        if isinstance(result, NightResult):
+            for target, role in result.revealed.values():
+                self.known[target] = role
+
+STRATEGIES: dict[str, Callable[[], Strategy]] = {
+    "random": RandomStrategy,
+    "informed": InformedStrategy,
+}
+
+# ============================================================
+# HEADLESS GAMES
+# ============================================================
+
+@dataclass
+class GameRecord:
+    winner: Faction | None
+    days: int
+    timings: dict[str, float] = field(default_factory=dict) # Phase name -> seconds spent
+
+def run_game(num_players: int, strategy: Callable[[], Strategy] = RandomStrategy, rng: random.Random | None = None, max_days: int = 100) -> GameRecord:
+    """Plays a full game with dummy players, like the /dummies debug path but without Discord."""
+    rng = rng if rng is not None else random.Random()
+    bot = strategy()
+    timings = {"setup": 0.0, "night": 0.0, "day": 0.0}
+
+    started = time.perf_counter()
+    game = WerewolfGame([], seed=rng.getrandbits(63))
+    game.roster.set_dummies(num_players)
+    game.setup_roles()
+    timings["setup"] += time.perf_counter() - started
+
+    while game.winner is None and game.day < max_days:
+        started = time.perf_counter()
+        game.begin_night()
+        actions = []
+        for role, players in game.night_roles().items():
+            for player in players:
+                targets = bot.night_targets(game, player, rng)
+                if targets is not None: actions.append(NightAction(player.id, role, targets))
+        night = game.resolve_night(actions, break_ties=True)
+        bot.observe(game, night)
+        timings["night"] += time.perf_counter() - started
+        if game.winner is not None: break
+
+        started = time.perf_counter()
+        votes = {}
+        for player in game.alive():
+            target = bot.vote(game, player, rng)
+            if target is not None: votes[player.id] = target
+        day = game.resolve_lynch(plurality(votes))
+        bot.observe(game, day)
+        timings["day"] += time.perf_counter() - started
+
+    return GameRecord(game.winner, game.day, timings)
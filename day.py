@@ -0,0 +1,93 @@
+import asyncio
+import logging
+
+import discord
+
+from game_config import *
+from channels import channel_cache
+from debounce import DebouncedEditor
+from metrics import instrumented, metrics
+from night import NOBODY, target_selects
+from registry import GameSession
+
+log = logging.getLogger(__name__)
+
+# ============================================================
+# VOTING
+# ============================================================
+
+class VoteView(discord.ui.View):
+    """Lynch vote menus. Each click is an O(1) tally update and a request to the debounced editor."""
+
+    def __init__(self, session: GameSession, editor: DebouncedEditor):
+        super().__init__(timeout=None)
+        self.game = session.game
+        self.editor = editor
+        for select in target_selects(self.game.alive(), "Vote to lynch", nobody="Withdraw my vote"):
+            select.callback = lambda interaction, select=select: self.vote(interaction, select)
+            self.add_item(select)
+
+    @instrumented
+    async def vote(self, interaction: discord.Interaction, select: discord.ui.Select):
+        target = None if NOBODY in select.values else int(select.values[0])
+        if not self.game.cast_vote(interaction.user.id, target):
+            await interaction.response.send_message("You can't vote right now.", ephemeral=True)
+            return
+        # Acknowledge without a message; the tally edit shows the vote
+        await interaction.response.defer()
+        self.editor.request()
+
+class CloseVoteView(discord.ui.View):
+    def __init__(self, narrators: set[int]):
+        super().__init__(timeout=None)
+        self.narrators = narrators
+        self.closed = asyncio.Event()
+
+    @discord.ui.button(label="Close Vote", style=discord.ButtonStyle.red)
+    @instrumented
+    async def close_vote_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if interaction.user.id not in self.narrators:
+            await interaction.response.send_message("Only narrators can close the vote.", ephemeral=True)
+            return
+        await interaction.response.defer()
+        self.closed.set()
+        self.stop()
+
+async def run_vote(session: GameSession, guild: discord.Guild, control: discord.TextChannel) -> int | None:
+    """
+    Runs the day's lynch vote in GENERAL and returns who it lynches. The tally message is
+    edited at most once per VOTE_UPDATE_INTERVAL while votes come in, then exactly once more
+    with the result after the narrator closes the vote or DAY_VOTE_DEADLINE passes.
+    """
+    game = session.game
+    general = channel_cache.text(guild, session.table, "GENERAL") or control
+
+    async with session.lock:
+        tally = game.open_vote()
+    message: discord.Message | None = None
+
+    async def edit_tally():
+        if message is None: return
+        metrics.inc("vote_edits")
+        await message.edit(content=game.vote_msg())
+
+    editor = DebouncedEditor("Vote", lambda: tally.version, edit_tally, delay=VOTE_UPDATE_INTERVAL)
+    editor.prime(tally.version)
+    vote_view = VoteView(session, editor)
+    message = await general.send(game.vote_msg(), view=vote_view)
+
+    close_view = CloseVoteView({member.id for member in game.narrators})
+    await control.send(f"**Day {game.day}**\nVoting is open in {general.mention}.", view=close_view)
+    try:
+        await asyncio.wait_for(close_view.closed.wait(), DAY_VOTE_DEADLINE)
+    except asyncio.TimeoutError:
+        log.info(f"Day {game.day} vote closed at the deadline")
+    close_view.stop()
+    vote_view.stop()
+
+    await editor.close()
+    async with session.lock:
+        target = game.close_vote()
+    await message.edit(content=game.vote_msg(final=True), view=None)
+    log.info(f"Day {game.day} vote: {len(tally.votes)} votes, {editor.requests} clicks, {editor.edits + 1} edits")
+    return target
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Hashable
+
+log = logging.getLogger(__name__)
+
+class DebouncedEditor:
+    """
+    Coalesces update requests for a single message. Requests arriving within `delay`
+    seconds of each other collapse into one edit, and the edit is skipped entirely if
+    the snapshot returned by `refresh` is unchanged since the last one sent.
+    """
+
+    def __init__(self, name: str, refresh: Callable[[], Hashable], edit: Callable[[], Awaitable[None]], delay: float = 0.5):
+        self.name = name
+        self.refresh = refresh
+        self.edit = edit
+        self.delay = delay
+        self.last_snapshot: Hashable | None = None
+        self.task: asyncio.Task | None = None
+        self.pending_since: float | None = None
+        self.requests = 0
+        self.edits = 0
+        self.sending = False
+
+    def prime(self, snapshot: Hashable):
+        """Record the state that is already displayed so the first request doesn't re-send it."""
+        self.last_snapshot = snapshot
+
+    def request(self):
+        self.requests += 1
+        if self.pending_since is None:
+            self.pending_since = time.perf_counter()
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.pending_since = None
+
+    async def close(self):
+        """Stops further edits. An edit already in flight is allowed to land, so nothing arrives after the caller's final edit."""
+        self.pending_since = None
+        if self.task is not None:
+            if self.sending: await self.task
+            else: self.task.cancel()
+            self.task = None
+
+    async def _run(self):
+        try:
+            while self.pending_since is not None:
+                await asyncio.sleep(self.delay)
+                await self._send()
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            log.exception(f"Failed to update {self.name} message")
+            self.pending_since = None
+
+    async def _send(self):
+        started = self.pending_since
+        self.pending_since = None
+        snapshot = self.refresh()
+        if snapshot == self.last_snapshot:
+            return
+        self.last_snapshot = snapshot
+        self.sending = True
+        try:
+            await self.edit()
+        finally:
+            self.sending = False
+        self.edits += 1
+        if started is not None:
+            latency_ms = (time.perf_counter() - started) * 1000
+            log.info(f"{self.name} edit sent {latency_ms:.0f}ms after first update ({self.requests} requests, {self.edits} edits)")
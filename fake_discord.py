@@ -0,0 +1,392 @@
+import asyncio
+import contextvars
+import itertools
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable
+
+import discord
+
+from metrics import metrics
+
+# ============================================================
+# REST
+# ============================================================
+
+# Which command the current task is serving, so API calls can be attributed to it
+current_command: contextvars.ContextVar[str] = contextvars.ContextVar("current_command", default="gateway")
+
+@dataclass
+class FakeResponse:
+    """Just enough of an aiohttp response for discord.HTTPException."""
+    status: int
+    reason: str
+    headers: dict[str, str] = field(default_factory=dict)
+
+@dataclass
+class RestStats:
+    calls: dict[str, int] = field(default_factory=dict) # Command -> API calls
+    routes: dict[str, int] = field(default_factory=dict) # Route -> API calls
+    throttled: int = 0 # Calls that waited on an exhausted bucket
+    throttle_wait: float = 0.0
+    rejected: int = 0 # Calls answered with a 429
+
+class FakeRest:
+    """
+    Stands in for Discord's REST API. Every call sleeps for a simulated round trip and is
+    charged to a rate-limit bucket keyed by route and major parameter. Like discord.py, an
+    exhausted bucket waits for its window to reset instead of failing; `reject_rate` makes
+    a share of calls fail with a 429 anyway, as happens when buckets are shared.
+    """
+
+    def __init__(self, latency: float = 0.03, bucket_limit: int = 5, bucket_window: float = 5.0, reject_rate: float = 0.0, rng: random.Random | None = None):
+        self.latency = latency
+        self.bucket_limit = bucket_limit
+        self.bucket_window = bucket_window
+        self.reject_rate = reject_rate
+        self.rng = rng if rng is not None else random.Random()
+        self.buckets: dict[Hashable, list[float]] = {} # Bucket -> call times inside the current window
+        self.stats = RestStats()
+
+    async def call(self, route: str, major: int | None = None, limited: bool = True):
+        command = current_command.get()
+        self.stats.calls[command] = self.stats.calls.get(command, 0) + 1
+        self.stats.routes[route] = self.stats.routes.get(route, 0) + 1
+
+        if limited:
+            window = self.buckets.setdefault((route, major), [])
+            throttled = False
+            while True:
+                now = time.monotonic()
+                window[:] = [t for t in window if now - t < self.bucket_window]
+                if len(window) < self.bucket_limit: break
+                wait = self.bucket_window - (now - window[0])
+                if not throttled: self.stats.throttled += 1
+                throttled = True
+                self.stats.throttle_wait += wait
+                await asyncio.sleep(wait)
+            window.append(now)
+
+        await asyncio.sleep(self.latency * self.rng.uniform(0.5, 1.5))
+        if limited and self.rng.random() < self.reject_rate:
+            self.stats.rejected += 1
+            metrics.record_request(route, 429)
+            raise discord.HTTPException(FakeResponse(429, "Too Many Requests", {"Retry-After": "0.1"}), "You are being rate limited.") # type: ignore
+        metrics.record_request(route, 200)
+
+class FakeHTTP:
+    """Replaces `client.http` for the raw calls main.py makes without a channel object."""
+
+    def __init__(self, world: "FakeDiscord"):
+        self.world = world
+
+    async def delete_channel_permissions(self, channel_id: int, target_id: int, reason: str | None = None):
+        await self.world.rest.call("DELETE /channels/{id}/permissions", channel_id)
+        channel = self.world.channels.get(channel_id)
+        if channel is None or channel.overwrites.pop(target_id, None) is None:
+            raise discord.NotFound(FakeResponse(404, "Not Found"), "Unknown Overwrite") # type: ignore
+
+    async def remove_role(self, guild_id: int, user_id: int, role_id: int, reason: str | None = None):
+        await self.world.rest.call("DELETE /guilds/{id}/members/roles", guild_id)
+        member = self.world.guilds[guild_id].get_member(user_id)
+        if member is None or role_id not in member.role_ids:
+            raise discord.NotFound(FakeResponse(404, "Not Found"), "Unknown Role") # type: ignore
+        member.role_ids.discard(role_id)
+
+# ============================================================
+# MODELS
+# ============================================================
+
+class FakeRole:
+    def __init__(self, id: int, name: str = ""):
+        self.id = id
+        self.name = name
+
+    def is_default(self) -> bool:
+        return False
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, FakeRole) and other.id == self.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+class FakeVoiceState:
+    def __init__(self, channel: "FakeVoiceChannel | None"):
+        self.channel = channel
+
+class FakeMember:
+    def __init__(self, guild: "FakeGuild", id: int, name: str, roles: list[int] | None = None):
+        self.guild = guild
+        self.id = id
+        self.display_name = name
+        self.name = name
+        self.role_ids = set(roles or [])
+        self.voice: FakeVoiceState | None = None
+
+    # Lets the fake pass `isinstance(member, discord.Member)` checks, the same trick unittest.mock uses
+    @property
+    def __class__(self):
+        return discord.Member
+
+    @property
+    def roles(self) -> list[FakeRole]:
+        return [self.guild.roles_by_id.get(role_id) or FakeRole(role_id) for role_id in self.role_ids]
+
+    def get_role(self, role_id: int) -> FakeRole | None:
+        return FakeRole(role_id) if role_id in self.role_ids else None
+
+    async def add_roles(self, *roles: FakeRole, reason: str | None = None):
+        for role in roles:
+            await self.guild.world.rest.call("PUT /guilds/{id}/members/roles", self.guild.id)
+            self.role_ids.add(role.id)
+
+    async def remove_roles(self, *roles: FakeRole, reason: str | None = None):
+        for role in roles:
+            await self.guild.world.rest.call("DELETE /guilds/{id}/members/roles", self.guild.id)
+            self.role_ids.discard(role.id)
+
+    async def edit(self, *, roles: list[FakeRole] | None = None, reason: str | None = None):
+        await self.guild.world.rest.call("PATCH /guilds/{id}/members", self.guild.id)
+        if roles is not None: self.role_ids = {role.id for role in roles}
+
+    def __repr__(self) -> str:
+        return f"<FakeMember {self.display_name}>"
+
+class FakeMessage:
+    def __init__(self, world: "FakeDiscord", channel: "FakeTextChannel", content: str, view: discord.ui.View | None):
+        self.world = world
+        self.id = world.next_id()
+        self.channel = channel
+        self.content = content
+        self.view = view
+
+    async def edit(self, *, content: str | None = None, view: discord.ui.View | None = None):
+        await self.world.rest.call("PATCH /channels/{id}/messages", self.channel.id)
+        if content is not None: self.content = content
+        self.view = view
+
+    async def delete(self):
+        await self.world.rest.call("DELETE /channels/{id}/messages", self.channel.id)
+        if self in self.channel.messages: self.channel.messages.remove(self)
+
+class FakeTextChannel:
+    type = discord.ChannelType.text
+
+    def __init__(self, world: "FakeDiscord", guild: "FakeGuild", id: int, name: str):
+        self.world = world
+        self.guild = guild
+        self.id = id
+        self.name = name
+        self.messages: list[FakeMessage] = []
+        self.overwrites: dict[int, dict[str, bool]] = {}
+
+    @property
+    def __class__(self):
+        return discord.TextChannel
+
+    @property
+    def mention(self) -> str:
+        return f"<#{self.id}>"
+
+    def permissions_for(self, member: FakeMember) -> discord.Permissions:
+        return discord.Permissions.all()
+
+    async def send(self, content: str, view: discord.ui.View | None = None) -> FakeMessage:
+        await self.world.rest.call("POST /channels/{id}/messages", self.id)
+        return self.post(content, view)
+
+    def post(self, content: str, view: discord.ui.View | None = None) -> FakeMessage:
+        message = FakeMessage(self.world, self, content, view if isinstance(view, discord.ui.View) else None)
+        self.messages.append(message)
+        return message
+
+    def get_partial_message(self, message_id: int) -> FakeMessage | None:
+        return next((m for m in self.messages if m.id == message_id), None)
+
+    async def set_permissions(self, target: FakeMember | FakeRole, **permissions: bool):
+        await self.world.rest.call("PUT /channels/{id}/permissions", self.id)
+        self.overwrites[target.id] = permissions
+
+    def overwrites_for(self, target: FakeMember | FakeRole) -> discord.PermissionOverwrite:
+        return discord.PermissionOverwrite(**self.overwrites.get(target.id, {}))
+
+    def find_view(self, view_type: "type[discord.ui.View]") -> discord.ui.View | None:
+        """The newest live view of the given type on this channel's messages."""
+        for message in reversed(self.messages):
+            if isinstance(message.view, view_type) and not message.view.is_finished():
+                return message.view
+        return None
+
+class FakeVoiceChannel:
+    type = discord.ChannelType.voice
+
+    def __init__(self, guild: "FakeGuild", id: int, name: str):
+        self.guild = guild
+        self.id = id
+        self.name = name
+        self.members: list[FakeMember] = []
+
+    @property
+    def __class__(self):
+        return discord.VoiceChannel
+
+class FakeGuild:
+    def __init__(self, world: "FakeDiscord", id: int):
+        self.world = world
+        self.id = id
+        self.channels: dict[int, FakeTextChannel | FakeVoiceChannel] = {}
+        self.members: dict[int, FakeMember] = {}
+        self.roles_by_id: dict[int, FakeRole] = {}
+        self.me = FakeMember(self, world.next_id(), "Werewolf Bot")
+        self.me.guild_permissions = discord.Permissions.all()
+
+    @property
+    def roles(self) -> list[FakeRole]:
+        return list(self.roles_by_id.values())
+
+    def get_role(self, role_id: int) -> FakeRole | None:
+        return self.roles_by_id.get(role_id)
+
+    async def create_role(self, *, name: str, reason: str | None = None) -> FakeRole:
+        await self.world.rest.call("POST /guilds/{id}/roles", self.id)
+        return self.add_role(name)
+
+    def add_role(self, name: str) -> FakeRole:
+        role = FakeRole(self.world.next_id(), name)
+        self.roles_by_id[role.id] = role
+        return role
+
+    async def fetch_channel(self, channel_id: int) -> FakeTextChannel | FakeVoiceChannel:
+        await self.world.rest.call("GET /channels/{id}", channel_id)
+        channel = self.channels.get(channel_id)
+        if channel is None: raise discord.NotFound(FakeResponse(404, "Not Found"), "Unknown Channel") # type: ignore
+        return channel
+
+    def get_channel(self, channel_id: int) -> FakeTextChannel | FakeVoiceChannel | None:
+        return self.channels.get(channel_id)
+
+    def get_member(self, user_id: int) -> FakeMember | None:
+        return self.members.get(user_id)
+
+    def add_text_channel(self, name: str) -> FakeTextChannel:
+        channel = FakeTextChannel(self.world, self, self.world.next_id(), name)
+        self.channels[channel.id] = channel
+        self.world.channels[channel.id] = channel
+        return channel
+
+    def add_voice_channel(self, name: str) -> FakeVoiceChannel:
+        channel = FakeVoiceChannel(self, self.world.next_id(), name)
+        self.channels[channel.id] = channel
+        return channel
+
+    def add_member(self, name: str, roles: list[int] | None = None) -> FakeMember:
+        member = FakeMember(self, self.world.next_id(), name, roles)
+        self.members[member.id] = member
+        return member
+
+# ============================================================
+# INTERACTIONS
+# ============================================================
+
+class FakeCallbackResponse:
+    def __init__(self, resource: FakeMessage | None):
+        self.resource = resource
+
+class FakeInteractionResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+        self.done = False
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def _acknowledge(self):
+        if self.done: raise discord.InteractionResponded(self.interaction) # type: ignore
+        self.done = True
+        await self.interaction.world.rest.call("POST /interactions/{id}/callback", limited=False)
+        self.interaction.acked = time.perf_counter()
+
+    async def send_message(self, content: str, *, view: Any = discord.utils.MISSING, ephemeral: bool = False) -> FakeCallbackResponse:
+        await self._acknowledge()
+        if ephemeral: return FakeCallbackResponse(None)
+        return FakeCallbackResponse(self.interaction.channel.post(content, view))
+
+    async def defer(self, *, ephemeral: bool = False, thinking: bool = False):
+        await self._acknowledge()
+
+class FakeWebhook:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+
+    async def send(self, content: str, *, view: Any = discord.utils.MISSING, ephemeral: bool = False, wait: bool = False) -> FakeMessage | None:
+        channel = self.interaction.channel
+        await self.interaction.world.rest.call("POST /webhooks/{id}", channel.id)
+        if ephemeral: return None
+        return channel.post(content, view)
+
+class FakeInteraction:
+    def __init__(self, world: "FakeDiscord", user: FakeMember, channel: FakeTextChannel):
+        self.world = world
+        self.user = user
+        self.guild = channel.guild
+        self.guild_id = channel.guild.id
+        self.channel = channel
+        self.channel_id = channel.id
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeWebhook(self)
+        self.acked: float | None = None
+
+# ============================================================
+# WORLD
+# ============================================================
+
+@dataclass
+class InteractionRecord:
+    command: str
+    ack: float | None # Seconds until the interaction was acknowledged
+    elapsed: float # Seconds until the handler returned
+    error: str | None = None
+
+class FakeDiscord:
+    """An in-process gateway and REST layer for driving main.py's handlers without a live guild."""
+
+    def __init__(self, rest: FakeRest):
+        self.rest = rest
+        self.ids = itertools.count(10_000)
+        self.guilds: dict[int, FakeGuild] = {}
+        self.channels: dict[int, FakeTextChannel] = {}
+        self.records: list[InteractionRecord] = []
+
+    def next_id(self) -> int:
+        return next(self.ids)
+
+    def add_guild(self) -> FakeGuild:
+        guild = FakeGuild(self, self.next_id())
+        self.guilds[guild.id] = guild
+        return guild
+
+    async def interact(self, command: str, user: FakeMember, channel: FakeTextChannel, handler: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> FakeInteraction:
+        """Runs a command or component handler the way the gateway would, recording its latency."""
+        interaction = FakeInteraction(self, user, channel)
+        token = current_command.set(command)
+        started = time.perf_counter()
+        error = None
+        try:
+            await handler(interaction, *args, **kwargs)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            current_command.reset(token)
+        ack = interaction.acked - started if interaction.acked is not None else None
+        self.records.append(InteractionRecord(command, ack, time.perf_counter() - started, error))
+        return interaction
+
+    async def move(self, member: FakeMember, channel: FakeVoiceChannel | None, on_voice_state_update: Callable[..., Awaitable[Any]]):
+        """Moves a member between voice channels and dispatches the voice state event."""
+        before = member.voice or FakeVoiceState(None)
+        if before.channel is not None: before.channel.members.remove(member)
+        member.voice = FakeVoiceState(channel) if channel is not None else None
+        if channel is not None: channel.members.append(member)
+        await on_voice_state_update(member, before, member.voice or FakeVoiceState(None))
@@ -1,4 +1,18 @@
+import json
+from dataclasses import dataclass
 from enum import Enum
+from pathlib import Path
+
+MIN_PLAYERS = 5
+WOLF_RATIO = 3 # One werewolf per 3 players
+
+class Faction(Enum):
+    VILLAGE = "Village"
+    WEREWOLVES = "Werewolves"
+
+# ============================================================
+# ROLE CATALOG
+# ============================================================
 
 class Role(Enum):
     VILLAGER = "Villager"
@@ -11,5 +25,50 @@ class Role(Enum):
     UNDERTAKER = "Undertaker"
     FLOWER_CHILD = "Flower Child"
 
-MIN_PLAYERS = 5
-WOLF_RATIO = 3 # One werewolf per 3 players
\ No newline at end of file
+# Role metadata lives in roles.json, so counts, night order and channels can be retuned without
+# touching code. The roles themselves stay in the enum above; the file must list exactly those.
+ROLE_CATALOG_PATH = Path(__file__).with_name("roles.json")
+
+@dataclass(frozen=True)
+class RoleInfo:
+    faction: Faction
+    max_count: int | None # None for no limit
+    night: int | None # Position in the night's resolution order, None if the role doesn't act
+    channel: str | None # TEXT_ID name whose channel the role's players can read
+
+def _load_catalog() -> dict[Role, RoleInfo]:
+    with open(ROLE_CATALOG_PATH, encoding="utf-8") as f:
+        entries = json.load(f)["roles"]
+    names = [entry["name"] for entry in entries]
+    if sorted(names) != sorted(Role.__members__):
+        missing, extra = set(Role.__members__) - set(names), set(names) - set(Role.__members__)
+        raise ValueError(f"{ROLE_CATALOG_PATH} must list every Role exactly once (missing: {sorted(missing)}, unknown: {sorted(extra)})")
+    return {Role[entry["name"]]: RoleInfo(Faction[entry["faction"]], entry.get("max"), entry.get("night"), entry.get("channel")) for entry in entries}
+
+ROLES: dict[Role, RoleInfo] = _load_catalog()
+
+FACTION = {role: info.faction for role, info in ROLES.items()}
+ROLE_INDEX = {role: i for i, role in enumerate(Role)} # Stable integer codes for vectorized simulation
+
+# Names and labels, lowercased with spaces for underscores, so "fortune teller" and "FORTUNE_TELLER" both work
+ROLE_LOOKUP = {key.lower().replace("_", " "): role for role in Role for key in (role.name, role.value)}
+
+# Special roles with one entry per allowed copy; a default setup draws from this without replacement
+SPECIAL_POOL = [role for role, info in ROLES.items() if role not in (Role.VILLAGER, Role.WEREWOLF) for _ in range(info.max_count or 1)]
+
+# Roles that act at night, in the order their actions resolve:
+#   Cupid          - First night only: links two lovers, who die together
+#   Fisherman      - Pulls a player into the boat, safe from wolves. Hooking a werewolf drowns the Fisherman
+#   Angel          - Protects a player from the werewolves
+#   Werewolf       - Kill one player, by plurality of the pack
+#   Fortune Teller - Learns a living player's role
+#   Undertaker     - Learns a dead player's role
+#   Flower Child   - Once per game: shields a player from the next lynch
+NIGHT_ORDER = sorted((role for role, info in ROLES.items() if info.night is not None), key=lambda role: ROLES[role].night) # type: ignore
+
+NIGHT_DEADLINE = 90 # Seconds each role has to act at night
+NIGHT_DEADLINES = {Role.WEREWOLF: 120} # Per-role overrides; the pack needs time to agree
+
+SHERIFF_VOTE_WEIGHT = 2 # The Sheriff's lynch vote counts this many times
+VOTE_UPDATE_INTERVAL = 2.0 # Seconds between live edits of the vote count
+DAY_VOTE_DEADLINE = 300 # Seconds before an open vote closes on its own
@@ -1,6 +1,14 @@
+from dataclasses import dataclass, field
 from enum import Enum, IntEnum
+from os import environ
+
+from dotenv import load_dotenv
 from game_config import *
 
+load_dotenv()
+# The guild the IDs below belong to: the first of DISCORD_GUILD_IDS
+GUILD_ID = int(environ.get("DISCORD_GUILD_IDS", environ.get("DISCORD_GUILD_ID", "0")).split(",")[0])
+
 class TEXT_ID(IntEnum):
     NARRATOR_CONTROL = 1444214467608186993
     GENERAL = 1444194038847639695
@@ -17,4 +25,39 @@ class TEXT_ID(IntEnum):
 class VOICE_ID(IntEnum):
     GENERAL = 1444194039363535011
     
-NARRATOR_ROLE = 1444242802316673024
\ No newline at end of file
+NARRATOR_ROLE = 1444242802316673024
+
+@dataclass(frozen=True)
+class TableConfig:
+    """The set of channels one game is played in. A guild can host several tables."""
+    guild_id: int
+    narrator_control: int
+    voice: int
+    narrator_role: int
+    text: dict[str, int] = field(default_factory=dict) # TEXT_ID name -> channel ID
+    role_prefix: str = "WW" # Access roles are named "<prefix>: <Role>"; must differ between a guild's tables, see check_tables
+    
+    @property
+    def channel_ids(self) -> list[int]:
+        return [self.narrator_control, self.voice, *self.text.values()]
+    
+DEFAULT_TABLE = TableConfig(
+    guild_id=GUILD_ID,
+    narrator_control=TEXT_ID.NARRATOR_CONTROL,
+    voice=VOICE_ID.GENERAL,
+    narrator_role=NARRATOR_ROLE,
+    text={channel.name: channel.value for channel in TEXT_ID},
+)
+
+# Add a TableConfig per extra set of channels to run games side by side
+TABLES: list[TableConfig] = [DEFAULT_TABLE]
+
+def check_tables(tables: list[TableConfig]):
+    """Rejects tables in one guild sharing an access role prefix, which would give each table's players the other's channels."""
+    prefixes: dict[tuple[int, str], int] = {}
+    for table in tables:
+        other = prefixes.setdefault((table.guild_id, table.role_prefix), table.narrator_control)
+        if other != table.narrator_control:
+            raise ValueError(f"Tables {other} and {table.narrator_control} share role_prefix {table.role_prefix!r}; give each table its own")
+
+check_tables(TABLES)
@@ -0,0 +1,64 @@
+import json
+import os
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+LEDGER_DIR = Path("ledgers")
+
+@dataclass(frozen=True)
+class Grant:
+    channel_id: int
+    target_id: int
+
+@dataclass(frozen=True)
+class RoleGrant:
+    role_id: int
+    member_id: int
+
+class OverwriteLedger:
+    """
+    Records every channel overwrite and access role the bot grants for a game, persisted to
+    disk so the grants can still be revoked after a crash or restart.
+    """
+
+    def __init__(self, game_id: str, guild_id: int, grants: list[Grant] | None = None, role_grants: list[RoleGrant] | None = None):
+        self.game_id = game_id
+        self.guild_id = guild_id
+        self.grants: list[Grant] = grants if grants is not None else []
+        self.role_grants: list[RoleGrant] = role_grants if role_grants is not None else []
+
+    @property
+    def path(self) -> Path:
+        return LEDGER_DIR / f"{self.game_id}.json"
+
+    def record(self, channel_id: int, target_id: int):
+        grant = Grant(channel_id, target_id)
+        if grant not in self.grants:
+            self.grants.append(grant)
+
+    def record_role(self, role_id: int, member_id: int):
+        grant = RoleGrant(role_id, member_id)
+        if grant not in self.role_grants:
+            self.role_grants.append(grant)
+
+    def save(self):
+        LEDGER_DIR.mkdir(exist_ok=True)
+        data = {"game_id": self.game_id, "guild_id": self.guild_id, "grants": [asdict(g) for g in self.grants], "roles": [asdict(g) for g in self.role_grants]}
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def delete(self):
+        self.path.unlink(missing_ok=True)
+
+    @classmethod
+    def load(cls, path: Path) -> "OverwriteLedger":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["game_id"], data["guild_id"], [Grant(**g) for g in data["grants"]], [RoleGrant(**g) for g in data.get("roles", [])])
+
+    @classmethod
+    def load_all(cls) -> list["OverwriteLedger"]:
+        if not LEDGER_DIR.exists(): return []
+        return [cls.load(path) for path in sorted(LEDGER_DIR.glob("*.json"))]
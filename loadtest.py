@@ -0,0 +1,149 @@
+#!/usr/bin/env -S uv run --script
+
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import random
+import tempfile
+import time
+from typing import Callable
+
+from guild_config import *
+from game_config import *
+from fake_discord import FakeDiscord, FakeGuild, FakeHTTP, FakeMember, FakeRest, FakeTextChannel
+from registry import GameRegistry
+import main
+
+# ============================================================
+# SCENARIO
+# ============================================================
+
+async def until(condition: Callable, handler: asyncio.Task, timeout: float = 30.0):
+    """Polls until `condition` returns something truthy, like a client waiting for a message to appear."""
+    deadline = time.monotonic() + timeout
+    while True:
+        value = condition()
+        if value: return value
+        if handler.done(): return None # The command gave up, e.g. on a failed REST call
+        if time.monotonic() > deadline: raise TimeoutError("Timed out waiting for the bot")
+        await asyncio.sleep(0.01)
+
+def build_table(guild: FakeGuild) -> TableConfig:
+    narrator_role = guild.add_role("Narrator").id
+    control = guild.add_text_channel("narrator-control")
+    voice = guild.add_voice_channel("general")
+    text = {name: control.id if name == "NARRATOR_CONTROL" else guild.add_text_channel(name.lower()).id for name in TEXT_ID.__members__}
+    return TableConfig(guild_id=guild.id, narrator_control=control.id, voice=voice.id, narrator_role=narrator_role, text=text)
+
+async def play(world: FakeDiscord, guild: FakeGuild, table: TableConfig, num_players: int, rng: random.Random):
+    """One table's worth of traffic: a lobby with churn, concurrent role edits, then setup and cleanup."""
+    control, voice = guild.channels[table.narrator_control], guild.channels[table.voice]
+    narrator = guild.add_member("Narrator", roles=[table.narrator_role])
+    players = [guild.add_member(f"Player {i + 1}") for i in range(num_players)]
+    late = players[-2:]
+    for member in [narrator, *players[:-2]]:
+        await world.move(member, voice, main.on_voice_state_update) # type: ignore
+
+    # === Lobby ===
+    new_game = asyncio.create_task(world.interact("new-game", narrator, control, main.new_game.callback)) # type: ignore
+    lobby = await until(lambda: control.find_view(main.NewGameView), new_game) # type: ignore
+    if lobby is None: return
+    await asyncio.gather(
+        *(world.interact("spectate", member, control, main.spectate.callback, "join") for member in rng.sample(players[:-2], 2)), # type: ignore
+        *(world.move(member, voice, main.on_voice_state_update) for member in late), # type: ignore
+    )
+    await world.move(late[0], None, main.on_voice_state_update)
+    await world.interact("start", narrator, control, lobby.start_game_button.callback) # type: ignore
+
+    # === Role Assignment ===
+    role_view = await until(lambda: control.find_view(main.AssignRolesView), new_game) # type: ignore
+    if role_view is None: return await cleanup(world, narrator, control)
+    await asyncio.gather(
+        world.interact("role", narrator, control, main.role.callback, "+Cupid, +Sheriff"), # type: ignore
+        world.interact("role", narrator, control, main.role.callback, "Werewolf > Angel, -Fisherman"), # type: ignore
+        world.interact("shuffle", narrator, control, role_view.shuffle_roles_button.callback), # type: ignore
+    )
+    await world.interact("assign", narrator, control, role_view.assign_roles_button.callback) # type: ignore
+    await new_game
+    await cleanup(world, narrator, control)
+
+async def cleanup(world: FakeDiscord, narrator: FakeMember, control: FakeTextChannel):
+    await world.interact("cleanup", narrator, control, main.cleanup.callback) # type: ignore
+
+# ============================================================
+# REPORT
+# ============================================================
+
+def percentile(values: list[float], q: float) -> float:
+    if not values: return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def report(world: FakeDiscord, elapsed: float):
+    commands: dict[str, list] = {}
+    for record in world.records:
+        commands.setdefault(record.command, []).append(record)
+
+    print(f"{'command':>10} {'count':>6} {'ack p50':>8} {'ack p99':>8} {'done p50':>9} {'done p99':>9} {'calls':>6} {'errors':>6}")
+    for command, records in commands.items():
+        acks = [r.ack * 1000 for r in records if r.ack is not None]
+        done = [r.elapsed * 1000 for r in records]
+        calls = world.rest.stats.calls.get(command, 0) / len(records)
+        errors = sum(r.error is not None for r in records)
+        print(f"{command:>10} {len(records):>6} {percentile(acks, 0.5):>8.1f} {percentile(acks, 0.99):>8.1f} "
+              f"{percentile(done, 0.5):>9.1f} {percentile(done, 0.99):>9.1f} {calls:>6.1f} {errors:>6}")
+
+    stats = world.rest.stats
+    # Access roles and their channel overwrites are provisioned once and kept; what each game hands out must come back
+    leftover = sum(target_id in channel.guild.members for channel in world.channels.values() for target_id in channel.overwrites)
+    access_roles = {role.id for guild in world.guilds.values() for role in guild.roles if role.name.startswith(f"{TableConfig.role_prefix}: ")}
+    leftover += sum(len(member.role_ids & access_roles) for guild in world.guilds.values() for member in guild.members.values())
+    print(f"\n{sum(stats.calls.values())} API calls in {elapsed:.2f}s, {stats.throttled} throttled ({stats.throttle_wait:.2f}s waiting), "
+          f"{stats.rejected} rejected with 429, {leftover} grants left behind")
+    for route, count in sorted(stats.routes.items(), key=lambda item: -item[1]):
+        print(f"  {count:>6} {route}")
+    for record in world.records:
+        if record.error is not None: print(f"  {record.command} failed: {record.error}")
+
+# ============================================================
+# MAIN
+# ============================================================
+
+async def run(args: argparse.Namespace):
+    rng = random.Random(args.seed)
+    world = FakeDiscord(FakeRest(args.latency, args.bucket_limit, args.bucket_window, args.reject_rate, rng))
+    guilds = [world.add_guild() for _ in range(args.games)]
+    tables = [build_table(guild) for guild in guilds]
+    main.client.games = GameRegistry(tables)
+    main.client.http = FakeHTTP(world) # type: ignore
+    main.GUILD_IDS.update(guild.id for guild in guilds)
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext():
+        await asyncio.gather(*(play(world, guild, table, args.players, rng) for guild, table in zip(guilds, tables)))
+    report(world, time.perf_counter() - started)
+
+def cli():
+    parser = argparse.ArgumentParser(description="Drives concurrent games through main.py against an in-process fake Discord.")
+    parser.add_argument("--games", type=int, default=10, help="Concurrent games, each in its own guild")
+    parser.add_argument("--players", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.03, help="Mean REST round trip in seconds")
+    parser.add_argument("--bucket-limit", type=int, default=5)
+    parser.add_argument("--bucket-window", type=float, default=5.0)
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="Share of calls answered with a 429")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Show the bot's own output")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+
+    # Ledgers and snapshots are written relative to the working directory; keep them away from the real ones
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        asyncio.run(run(args))
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,126 @@
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from pathlib import Path
+
+LOG_PATH = Path(os.environ.get("WEREWOLF_LOG_PATH", "discord.log"))
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_MAX_AGE = 24 * 60 * 60 # Seconds before a log file is rotated even if it's small
+LOG_BACKUPS = 7
+
+# Game and guild the current task is working on; asyncio tasks inherit it from their creator
+log_context: contextvars.ContextVar[dict[str, object]] = contextvars.ContextVar("log_context", default={})
+
+def bind(**fields: object) -> contextvars.Token:
+    """Tags every record logged from the current task (and tasks it spawns) with `fields`."""
+    return log_context.set({**log_context.get(), **fields})
+
+# ============================================================
+# RECORDS
+# ============================================================
+
+class ContextFilter(logging.Filter):
+    """Copies the bound context onto the record. Runs on the logging thread's caller, where the context lives."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.context = log_context.get()
+        return True
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most `burst` warnings per logging call site every `window` seconds, so an
+    f-string message still counts as one source. Once the window passes, the next record
+    notes how many were dropped. INFO and below pass untouched, since the latency and batch
+    lines are needed for every game, and errors always pass.
+    """
+
+    def __init__(self, burst: int = 10, window: float = 60.0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.windows: dict[tuple[str, int], list] = {} # (file, line) -> [window start, count, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.WARNING: return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        entry = self.windows.get(key)
+        if entry is None or now - entry[0] >= self.window:
+            suppressed = entry[2] if entry is not None else 0
+            self.windows[key] = [now, 1, 0]
+            if suppressed: record.suppressed = suppressed
+            return True
+        entry[1] += 1
+        if entry[1] <= self.burst: return True
+        entry[2] += 1
+        return False
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **getattr(record, "context", {}),
+        }
+        if getattr(record, "suppressed", 0): data["suppressed"] = record.suppressed
+        if record.exc_info: data["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text: data["exc"] = record.exc_text
+        return json.dumps(data, default=str)
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """Keeps the message and traceback as separate fields instead of folding them into one string."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+# ============================================================
+# FILES
+# ============================================================
+
+class RotatingJsonFileHandler(logging.handlers.RotatingFileHandler):
+    """Rolls over once the file passes `max_bytes` or is older than `max_age` seconds."""
+
+    def __init__(self, path: Path, max_bytes: int = LOG_MAX_BYTES, max_age: float = LOG_MAX_AGE, backups: int = LOG_BACKUPS):
+        super().__init__(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        self.max_age = max_age
+        self.rollover_at = time.time() + max_age
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        return time.time() >= self.rollover_at or bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.max_age
+
+def setup_logging(path: Path = LOG_PATH, level: int = logging.INFO) -> logging.handlers.QueueListener:
+    """
+    Routes every logger through an in-memory queue so handlers never touch the disk on the
+    event loop. A listener thread formats the records as JSON lines and writes them out.
+    Call `.stop()` on the returned listener at shutdown to flush the queue.
+    """
+    file_handler = RotatingJsonFileHandler(path)
+    file_handler.setFormatter(JsonFormatter())
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = QueueHandler(records)
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(RateLimitFilter())
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+    listener = logging.handlers.QueueListener(records, file_handler, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -3,443 +3,637 @@
 import discord
 from discord import app_commands
 import asyncio
-import random
+import time
+from dataclasses import dataclass
 
 import logging
 from dotenv import load_dotenv
 from os import environ
-from typing import Literal
+from typing import Hashable, Literal
 
 from guild_config import *
 from game_config import *
-
-# ============================================================
-# MODEL DEFINITIONS
-# ============================================================
-
-class Player:
-    id: int
-    name: str
-    role: Role | None
-    dead: bool = False
-    
-    def __init__(self, id: int, name: str):
-        self.id = id
-        self.name = name
-        self.role = None
-
-class WerewolfGame:
-    call_members: list[discord.Member] = []
-    narrators: list[discord.Member] = []
-    spectators: list[discord.Member] = []
-    players: list[Player] = []
-    roles: list[Role] = []
-    
-    # Debug features
-    dummies: list[Player] = []
-    debug_narrator: discord.Member | None = None
-    
-    def __init__(self, players: list[discord.Member]):
-        self.set_players(players)
-    
-    def add_spectator(self, member: discord.Member) -> bool:
-        if member not in self.spectators and member not in self.narrators:
-            self.spectators.append(member)
-            self.set_players()
-            return True
-        return False
-    
-    def remove_spectator(self, member: discord.Member) -> bool:
-        if member in self.spectators and member not in self.narrators:
-            self.spectators.remove(member)
-            self.set_players()
-            return True
-        return False
-            
-    def set_players(self, members: list[discord.Member] | None = None):
-        if members is None: members = self.call_members
-        else: self.call_members = members
-        self.narrators = [m for m in members if m.get_role(NARRATOR_ROLE) is not None]
-        self.narrators += [self.debug_narrator] if self.debug_narrator is not None else []
-        self.players = [Player(m.id, m.display_name) for m in members if m not in self.spectators and m not in self.narrators]
-        self.players += self.dummies
-        
-    def setup_roles(self):
-        num_players = len(self.players)
-        num_werewolves = max(1, num_players // WOLF_RATIO)
-        self.roles = [Role.WEREWOLF] * num_werewolves
-        remaining_roles = [role for role in Role if role != Role.WEREWOLF and role != Role.VILLAGER]
-        while remaining_roles and len(self.roles) < num_players:
-            role_pick = random.choice(remaining_roles)
-            remaining_roles.remove(role_pick)
-            self.roles.append(role_pick)
-        self.roles += [Role.VILLAGER] * (num_players - len(self.roles))
-        self.shuffle_roles()
-        
-    def shuffle_roles(self):
-        random.shuffle(self.roles)
-        for i, player in enumerate(self.players):
-            player.role = self.roles[i]
-        
-    def add_role(self, role: Role) -> bool:
-        if Role.VILLAGER in self.roles:
-            self.roles.remove(Role.VILLAGER)
-            self.roles.append(role)
-            self.shuffle_roles()
-            return True
-        return False
-    
-    def remove_role(self, role: Role) -> bool:
-        if role in self.roles:
-            if role == Role.WEREWOLF and self.roles.count(Role.WEREWOLF) == 1:
-                return False
-            self.roles.remove(role)
-            self.roles.append(Role.VILLAGER)
-            self.shuffle_roles()
-            return True
-        return False
-    
-    def lobby_msg(self, started=False) -> str:
-        msg = "**Werewolf**\n"
-        msg += f"*Narrators ({len(self.narrators)}/1):*\n"
-        msg += f"{'\n'.join([member.display_name for member in self.narrators]) if self.narrators else 'None'}\n\n"
-        msg += f"*Players ({len(self.players)}/{MIN_PLAYERS}):*\n"
-        msg += f"{'\n'.join([member.name for member in self.players]) if self.players else 'None'}\n\n"
-        if self.spectators:
-            msg += "*Spectators:*\n"
-            msg += f"{'\n'.join([member.display_name for member in self.spectators])}\n\n"
-        if not started: msg += f"Press 'Start Game' when ready."
-        else: msg += "*The game has started!*"
-        return msg
-    
-    def role_msg(self, started=False) -> str:
-        if not started: msg = "**Werewolf - Role Assignment**\n"
-        else: msg = "**Werewolf - Roles Assigned**\n"
-        for player in self.players:
-            role = player.role
-            if role is not None:
-                msg += f"- {player.name}: {role.value}\n"
-                
-        msg += f"\n*Werewolves: {self.roles.count(Role.WEREWOLF)}/{len(self.players)}*"
-        if not started:
-            msg += "\n*Use '/role' to adjust role counts.*"
-        return msg
+from debounce import DebouncedEditor
+from scheduler import RestCall, RestScheduler, ScheduleSummary, messages_bucket, permissions_bucket
+from ledger import Grant, OverwriteLedger, RoleGrant
+from access import bury, grant_roles, provision_roles
+from channels import TableHandles, channel_cache
+from render import PagedMessage
+from core import MESSAGE_LIMIT, Phase, WerewolfGame, parse_role_edits
+from core.balance import QUICK_GAMES, balance_cache, composition_key
+from registry import GameRegistry, GameSession
+from command_sync import CommandSyncCache, tree_hash
+from logs import bind, log_context, setup_logging
+from metrics import export_periodically, instrumented, metrics, stats_summary, trace_config
+from night import night_report, run_night
+from day import run_vote
+from snapshot import archive_game, delete_snapshot, load_snapshots, save_snapshot
 
 # ============================================================
 # DISCORD CLIENT SETUP
 # ============================================================
 
 load_dotenv()
-TEST_GUILD = discord.Object(id=int(environ.get("DISCORD_GUILD_ID", 0)))
+GUILDS = [discord.Object(id=int(guild_id)) for guild_id in environ.get("DISCORD_GUILD_IDS", environ.get("DISCORD_GUILD_ID", "0")).split(",")]
+GUILD_IDS = {guild.id for guild in GUILDS}
+FORCE_SYNC = environ.get("DISCORD_FORCE_SYNC", "") not in ("", "0") # Set to sync commands even if unchanged
 
 class WerewolfClient(discord.Client):
-    game: WerewolfGame | None = None
-    
-    role_msg: discord.Message | None = None
-    role_view: discord.ui.View | None = None
-    
     def __init__(self, *, intents: discord.Intents):
-        super().__init__(intents=intents)
+        super().__init__(intents=intents, http_trace=trace_config())
         self.tree = app_commands.CommandTree(self)
+        self.scheduler = RestScheduler()
+        self.games = GameRegistry(TABLES)
+        self.resumed = False
+        self.started = time.perf_counter()
         
     async def setup_hook(self):
-        # This copies the global commands over to your guild.
-        self.tree.copy_global_to(guild=TEST_GUILD)
-        await self.tree.sync(guild=TEST_GUILD)
+        # This copies the global commands over to each configured guild.
+        # Syncing is rate limited, so it's skipped when the tree matches what was last uploaded
+        started = time.perf_counter()
+        self.metrics_task = asyncio.create_task(export_periodically())
+        sync_cache = CommandSyncCache()
+        for guild in GUILDS:
+            self.tree.copy_global_to(guild=guild)
+            digest = tree_hash(self.tree, guild)
+            if not FORCE_SYNC and sync_cache.is_current(guild.id, digest):
+                logging.info(f"Commands for guild {guild.id} unchanged, skipping sync")
+                continue
+            await self.tree.sync(guild=guild)
+            sync_cache.mark_synced(guild.id, digest)
+            logging.info(f"Synced commands for guild {guild.id}")
+        logging.info(f"Setup hook finished in {(time.perf_counter() - started) * 1000:.1f} ms ({time.perf_counter() - self.started:.2f} s since start)")
 
 intents = discord.Intents.default()
 intents.message_content = True
+intents.members = True # Needed for narrator role changes to reach the lobby
 client = WerewolfClient(intents=intents)
 
+async def revoke_grant(grant: Grant | RoleGrant, guild_id: int):
+    try:
+        if isinstance(grant, RoleGrant):
+            await client.http.remove_role(guild_id, grant.member_id, grant.role_id, reason="Werewolf cleanup")
+        else:
+            await client.http.delete_channel_permissions(grant.channel_id, grant.target_id, reason="Werewolf cleanup")
+    except discord.NotFound:
+        pass # Already removed
+        
+async def revoke_ledger(ledger: OverwriteLedger) -> ScheduleSummary:
+    # Access roles come off with one call per player; overwrites are left over from older ledgers
+    calls: dict[str, tuple[Grant | RoleGrant, Hashable]] = {f"{grant.target_id} -> {grant.channel_id}": (grant, permissions_bucket(grant.channel_id)) for grant in ledger.grants}
+    calls |= {f"{grant.member_id} -> role {grant.role_id}": (grant, ("member", ledger.guild_id)) for grant in ledger.role_grants}
+    summary = await client.scheduler.run([RestCall(label, bucket, lambda g=grant: revoke_grant(g, ledger.guild_id)) for label, (grant, bucket) in calls.items()])
+    if summary.failed:
+        failed = [calls[result.label][0] for result in summary.failed]
+        ledger.grants = [grant for grant in failed if isinstance(grant, Grant)]
+        ledger.role_grants = [grant for grant in failed if isinstance(grant, RoleGrant)]
+        ledger.save()
+    else:
+        ledger.delete()
+    return summary
+
+async def end_game(session: GameSession) -> ScheduleSummary | None:
+    if session.lobby_editor is not None:
+        session.lobby_editor.cancel()
+        session.lobby_editor = None
+    client.games.close(session)
+    if session.phase_task is not None and session.phase_task is not asyncio.current_task():
+        session.phase_task.cancel()
+    if session.game.phase != Phase.LOBBY: archive_game(session)
+    delete_snapshot(session)
+    
+    ledger, session.ledger = session.ledger, None
+    if ledger is None: return None
+    return await revoke_ledger(ledger)
+
+async def resume_games():
+    """Reopens games from their snapshots, then revokes access left behind by games that can't be resumed."""
+    started = time.perf_counter()
+    ledgers = {ledger.game_id: ledger for ledger in OverwriteLedger.load_all()}
+    resumed = ended = 0
+    for data in load_snapshots():
+        guild = client.get_guild(data["guild_id"])
+        table = client.games.table_for(data["guild_id"], data["table"])
+        if guild is None or table is None or client.games.get(guild.id, table.narrator_control) is not None:
+            logging.warning(f"Cannot resume game {data['guild_id']}-{data['table']}: guild or table no longer configured")
+            continue
+            
+        session = client.games.open(guild.id, table, WerewolfGame.from_state(data["game"], guild.get_member))
+        context = bind(game_id=session.game_id, guild_id=guild.id)
+        game = session.game
+        # Ledgers written before they carried the game's seed are keyed by table alone
+        session.ledger = ledgers.pop(session.ledger_id, None) or ledgers.pop(session.game_id, None)
+        
+        role_msg = data["role_msg"]
+        channel = guild.get_channel(role_msg["channel_id"]) if role_msg is not None else None
+        control = channel_cache.get(guild, table).control
+        assigning = game.phase == Phase.ROLE_ASSIGNMENT
+        resumable = isinstance(channel, discord.TextChannel) if assigning else game.phase in (Phase.NIGHT, Phase.DAY) and control is not None
+        if not resumable:
+            # Won but never cleaned up, or its channels are gone; nothing would drive it, so free the table
+            logging.warning(f"Ending game {session.game_id} in phase {game.phase.name}: it can't be resumed")
+            await end_game(session)
+            log_context.reset(context)
+            ended += 1
+            continue
+            
+        if isinstance(channel, discord.TextChannel):
+            session.role_msg = PagedMessage(lambda content, view, c=channel: c.send(content, view=view))
+            messages = [channel.get_partial_message(message_id) for message_id in role_msg["message_ids"]]
+            session.role_msg.restore(messages, game.role_pages(started=not assigning), has_view=assigning)
+            if assigning:
+                session.role_view = AssignRolesView(session)
+                client.add_view(session.role_view, message_id=role_msg["message_ids"][-1])
+                session.phase_task = asyncio.create_task(resume_role_assignment(session, guild, channel))
+        if not assigning:
+            session.phase_task = asyncio.create_task(run_phases(session, guild, control)) # type: ignore
+        log_context.reset(context)
+        resumed += 1
+        
+    # Any other ledger left on disk belongs to a game that didn't end cleanly
+    for ledger in ledgers.values():
+        summary = await revoke_ledger(ledger)
+        logging.info(f"Revoked stale access ledger {ledger.game_id}: {summary}")
+    logging.info(f"Resumed {resumed} game(s) and ended {ended} in {(time.perf_counter() - started) * 1000:.1f} ms")
+
 @client.event
 async def on_ready():
-    logging.info(f'Logged in as {client.user}')
+    logging.info(f'Logged in as {client.user} ({time.perf_counter() - client.started:.2f} s since start)')
+    
+    # A fresh READY rebuilds the guild cache, so handles from before it are stale
+    report = await channel_cache.validate(client.guilds, TABLES, client.scheduler)
+    if report.problems: logging.warning(f"Channel config: {report}")
+    else: logging.info(f"Channel config: {report}")
+    if not client.resumed:
+        client.resumed = True
+        await resume_games()
+
+@client.event
+async def on_guild_channel_create(channel: discord.abc.GuildChannel):
+    # Also sent when the bot is given access to an existing channel, so a reported problem may just have been fixed
+    table = client.games.tables.get(channel.id)
+    if table is not None and table.guild_id == channel.guild.id: channel_cache.invalidate_table(table)
+
+@client.event
+async def on_guild_role_create(role: discord.Role):
+    for table in client.games.tables.values():
+        if table.narrator_role == role.id and table.guild_id == role.guild.id: channel_cache.invalidate_table(table)
+    
+@client.event
+async def on_guild_channel_update(before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+    channel_cache.invalidate(after.id)
+    
+@client.event
+async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+    channel_cache.invalidate(channel.id)
+    
+@client.event
+async def on_guild_role_update(before: discord.Role, after: discord.Role):
+    channel_cache.invalidate(after.id)
+    
+@client.event
+async def on_guild_role_delete(role: discord.Role):
+    channel_cache.invalidate(role.id)
+    
+@client.event
+async def on_voice_state_update(member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+    before_id = before.channel.id if before.channel is not None else None
+    after_id = after.channel.id if after.channel is not None else None
+    if before_id == after_id: return
+    for channel_id in (before_id, after_id):
+        session = client.games.get(member.guild.id, channel_id)
+        if session is None or session.lobby_editor is None or channel_id != session.table.voice: continue
+        bind(game_id=session.game_id, guild_id=member.guild.id)
+        if channel_id == after_id: session.game.roster.join(member)
+        else: session.game.roster.leave(member.id)
+        session.lobby_editor.request()
+        
+@client.event
+async def on_member_update(before: discord.Member, after: discord.Member):
+    if after.voice is None or after.voice.channel is None: return
+    session = client.games.get(after.guild.id, after.voice.channel.id)
+    if session is None or session.lobby_editor is None or after.voice.channel.id != session.table.voice: return
+    narrator_role = session.table.narrator_role
+    if (before.get_role(narrator_role) is None) != (after.get_role(narrator_role) is None):
+        bind(game_id=session.game_id, guild_id=after.guild.id)
+        session.game.roster.update(after)
+        session.lobby_editor.request()
+
+# ============================================================
+# PRECONDITIONS
+# ============================================================
+
+ROSTER_LOCKED = "The roster is fixed once the game has started; this can only be changed in the lobby."
+
+@dataclass
+class CommandContext:
+    guild: discord.Guild
+    member: discord.Member
+    table: TableConfig | None
+    handles: TableHandles | None
+    session: GameSession | None
+
+async def preconditions(interaction: discord.Interaction, where: Literal["guild", "table", "control"] = "control", session: str | None = None, narrator: bool = False, lobby: bool = False) -> CommandContext | None:
+    """
+    The guards every command shares. `where` is how close to a table the command must be used,
+    `session` names what the command does to the game when it needs one open, `narrator`
+    restricts it to the table's narrators, and `lobby` to games that haven't started yet.
+    Replies with the first failed check and returns None.
+    """
+    guild, member = interaction.guild, interaction.user
+    table = client.games.table_for(interaction.guild_id, interaction.channel_id)
+    handles = channel_cache.get(guild, table) if guild is not None and table is not None else None
+    game_session = client.games.get(interaction.guild_id, interaction.channel_id)
+    if game_session is not None: bind(game_id=game_session.game_id, guild_id=game_session.key[0])
+    failure = None
+    if guild is None or guild.id not in GUILD_IDS:
+        failure = "This command can only be used in the configured guild."
+    elif not isinstance(member, discord.Member):
+        failure = "This command can only be used by guild members."
+    elif where == "table" and table is None:
+        failure = "This command can only be used in a configured game channel."
+    elif where == "control" and (handles is None or handles.control is None or interaction.channel_id != table.narrator_control): # type: ignore
+        failure = "This command can only be used in a NARRATOR_CONTROL text channel."
+    elif narrator and (table is None or member.get_role(table.narrator_role) is None):
+        failure = "Only narrators can use this command."
+    elif session is not None and game_session is None:
+        failure = f"There is no active game to {session}."
+    elif lobby and game_session is not None and game_session.game.phase != Phase.LOBBY:
+        failure = ROSTER_LOCKED
+    if failure is not None:
+        await interaction.response.send_message(failure, ephemeral=True)
+        return None
+    return CommandContext(guild, member, table, handles, game_session) # type: ignore
 
 # ============================================================
 # COMMANDS
 # ============================================================
 
-@client.tree.command(name="test-channel-config", description="Pings every channel to test config setup.", guild=TEST_GUILD)
+@client.tree.command(name="test-channel-config", description="Pings every channel to test config setup.", guilds=GUILDS)
+@instrumented
 async def test_channel_config(interaction: discord.Interaction):
-    guild = interaction.guild
-    if guild is None or guild.id != TEST_GUILD.id:
-        await interaction.response.send_message("This command can only be used in the configured guild.")
-        return
-    
-    for channel in TEXT_ID:
-        discord_channel = guild.get_channel(channel)
-        if discord_channel is None or discord_channel.type != discord.ChannelType.text:
-            await interaction.response.send_message(f"Text channel for {channel.name} with ID {channel} not found.")
-        else:
-            try:
-                await discord_channel.send(f"This is a test message for the {channel.name} channel.")
-            except discord.errors.Forbidden as e:
-                await interaction.response.send_message(content=f"Failed to send message to {channel.name} channel: does the bot have permission?")
-    
-    await interaction.response.send_message("Sent a test message to all configured channels.", ephemeral=True)
+    ctx = await preconditions(interaction, "table")
+    if ctx is None: return
+        
+    # Probe every resolved channel at once, then answer with a single report
+    await interaction.response.defer(ephemeral=True)
+    report = await channel_cache.validate([ctx.guild], [ctx.table], client.scheduler) # type: ignore
+    handles = report.tables[(ctx.guild.id, ctx.table.narrator_control)] # type: ignore
+    calls = [RestCall(name, messages_bucket(channel), lambda c=channel, name=name: c.send(f"This is a test message for the {name} channel."))
+             for name, channel in handles.text.items()]
+    summary = await client.scheduler.run(calls)
+    problems = report.problems + [f"Failed to send message to {result.label} channel: {result.error}" for result in summary.failed]
+    if problems:
+        await interaction.followup.send(f"Found {len(problems)} problem(s) with this table's config:\n" + "\n".join(f"- {problem}" for problem in problems), ephemeral=True)
+    else:
+        await interaction.followup.send(f"Sent a test message to all configured channels. ({summary})", ephemeral=True)
     
 class NewGameView(discord.ui.View):
-    def __init__(self, update_task: asyncio.Task, game: WerewolfGame):
+    def __init__(self, session: GameSession):
         super().__init__(timeout=None)
-        self.update_task = update_task
-        self.game = game
+        self.session = session
+        self.game = session.game
         self.value = None
         
     @discord.ui.button(label="Start Game", style=discord.ButtonStyle.green)
+    @instrumented
     async def start_game_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.update_task.cancel()
-        await interaction.response.edit_message(content=self.game.lobby_msg(started=True), view=None)
+        if self.session.lobby_editor is not None: self.session.lobby_editor.cancel()
+        await interaction.response.defer() # new_game re-renders every page once the view stops
         self.value = 'start'
         self.stop()
         
     @discord.ui.button(label="Cancel Game", style=discord.ButtonStyle.red)
+    @instrumented
     async def cancel_game_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.update_task.cancel()
-        await interaction.response.edit_message(content="**Werewolf**\n*Game canceled*", view=None)
+        if self.session.lobby_editor is not None: self.session.lobby_editor.cancel()
+        await interaction.response.defer()
         self.value = 'cancel'
         self.stop()
         
+# Balance estimates being simulated in a worker thread, by composition. Holding the tasks here
+# keeps them alive, since the event loop only references tasks weakly
+estimating: dict[str, asyncio.Task] = {}
+
+async def render_roles(session: GameSession):
+    """Re-renders the role message while roles can still change, then fills in a missing balance estimate."""
+    if session.role_msg is None or session.role_view is None or session.role_view.is_finished(): return
+    await session.role_msg.sync(session.game.role_pages(), session.role_view)
+    estimate_balance(session)
+    
+def estimate_balance(session: GameSession):
+    """Simulates the current composition off the event loop and re-renders once the estimate lands."""
+    game = session.game
+    roles = list(game.roles)
+    key = composition_key(roles)
+    if not roles or key in estimating or game.balance_estimate() is not None: return
+    
+    async def run():
+        await asyncio.to_thread(balance_cache.estimate, roles, QUICK_GAMES)
+        if composition_key(game.roles) == key: await render_roles(session)
+    estimating[key] = asyncio.create_task(run())
+    estimating[key].add_done_callback(lambda _: estimating.pop(key, None))
+    
 class AssignRolesView(discord.ui.View):
-    def __init__(self, game: WerewolfGame):
+    def __init__(self, session: GameSession):
         super().__init__(timeout=None)
-        self.game = game
+        self.session = session
+        self.game = session.game
         self.accept = False
     
-    @discord.ui.button(label="Assign Roles", style=discord.ButtonStyle.green)
+    # Stable custom IDs let the view be re-attached to its message after a restart
+    @discord.ui.button(label="Assign Roles", style=discord.ButtonStyle.green, custom_id="werewolf:assign_roles")
+    @instrumented
     async def assign_roles_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.defer()
         self.accept = True
         self.stop()
         
-    @discord.ui.button(label="Shuffle Roles", style=discord.ButtonStyle.blurple)
+    @discord.ui.button(label="Shuffle Roles", style=discord.ButtonStyle.blurple, custom_id="werewolf:shuffle_roles")
+    @instrumented
     async def shuffle_roles_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.game.shuffle_roles()
-        await interaction.response.edit_message(content=self.game.role_msg(), view=self)
+        bind(game_id=self.session.game_id, guild_id=self.session.key[0])
+        async with self.session.lock:
+            self.game.shuffle_roles()
+        await interaction.response.defer()
+        await render_roles(self.session)
+        save_snapshot(self.session)
             
-@client.tree.command(name="new-game", description="Opens a new game of Werewolf. Detects players based on voice channel members.", guild=TEST_GUILD)
-async def new_game(interaction: discord.Interaction):
-    print("NEW GAME COMMAND INVOKED")
-    
-    guild = interaction.guild
-    if guild is None or guild.id != TEST_GUILD.id:
-        await interaction.response.send_message("This command can only be used in the configured guild.", ephemeral=True)
-        return
+@client.tree.command(name="new-game", description="Opens a new game of Werewolf. Detects players based on voice channel members.", guilds=GUILDS)
+@app_commands.describe(balanced="Pick the most balanced role composition found by simulation.")
+@instrumented
+async def new_game(interaction: discord.Interaction, balanced: bool = False):
+    logging.info("New game command invoked")
     
-    if interaction.channel is None or interaction.channel.id != TEXT_ID.NARRATOR_CONTROL or interaction.channel.type != discord.ChannelType.text:
-        await interaction.response.send_message("This command can only be used in the NARRATOR_CONTROL text channel.", ephemeral=True)
-        return
+    ctx = await preconditions(interaction)
+    if ctx is None: return
+    guild, table, voice_channel = ctx.guild, ctx.table, ctx.handles.voice # type: ignore
     
-    if client.game is not None:
+    if ctx.session is not None:
         await interaction.response.send_message("A game is already in progress. Please wait for it to finish before starting a new one.", ephemeral=True)
         return
     
-    voice_channel = guild.get_channel(VOICE_ID.GENERAL)
-    if voice_channel is None or voice_channel.type != discord.ChannelType.voice:
+    if voice_channel is None:
         await interaction.response.send_message("Voice channel for GENERAL not found.", ephemeral=True)
         return
     
     # === Lobby Setup ===
-    print("Setting up new game lobby...")
-    client.game = WerewolfGame(players=voice_channel.members)
-    async def update_lobby_message():
-        if client.game is None: raise Exception("Game model is None in lobby task.")
-        while True:
-            try:
-                client.game.set_players(voice_channel.members)
-                lobby_view.start_game_button.disabled = len(client.game.players) < MIN_PLAYERS or len(client.game.narrators) < 1
-                await interaction.edit_original_response(content=client.game.lobby_msg(), view=lobby_view)
-                await asyncio.sleep(1)
-            except asyncio.CancelledError:
-                break
-            
-    update_task = asyncio.create_task(update_lobby_message())
-    lobby_view = NewGameView(update_task, client.game)
-    await interaction.response.send_message(client.game.lobby_msg(), view=lobby_view)
-    await lobby_view.wait()
-    print("View awaited")
-    if lobby_view.value is None or lobby_view.value == 'cancel':
-        client.game = None
-        print("Game canceled.")
-        return
-    
-    print("Game started with players:", [p.name for p in client.game.players])
-    
-    # === Role Assignment ===
-    client.game.setup_roles()
-    
-    client.role_view = AssignRolesView(client.game)
-    client.role_msg = await interaction.channel.send(client.game.role_msg(), view=client.role_view)
-    await client.role_view.wait()
-    await client.role_msg.edit(content=client.game.role_msg(started=True), view=None)
+    session = client.games.open(guild.id, table, WerewolfGame(players=voice_channel.members, narrator_role=table.narrator_role))
+    bind(game_id=session.game_id, guild_id=guild.id)
+    # Anything that fails from here on must free the table, or it stays stuck with a game in progress
+    try:
+        logging.info("Setting up new game lobby")
+        game = session.game
+        lobby_view = NewGameView(session)
+        
+        # Roster changes arrive through the voice and member update events
+        def refresh_lobby():
+            lobby_view.start_game_button.disabled = len(game.players) < MIN_PLAYERS or len(game.narrators) < 1
+            return (tuple(game.lobby_pages()), lobby_view.start_game_button.disabled)
+        
+        async def edit_lobby():
+            metrics.inc("lobby_edits")
+            await lobby_message.sync(game.lobby_pages(), lobby_view, lobby_view.start_game_button.disabled)
+        
+        lobby_message = PagedMessage(lambda content, view: interaction.followup.send(content, view=view if view is not None else discord.utils.MISSING, wait=True))
+        session.lobby_editor = DebouncedEditor("Lobby", refresh_lobby, edit_lobby)
+        session.lobby_editor.prime(refresh_lobby())
+        pages = game.lobby_pages()
+        callback = await interaction.response.send_message(pages[0], view=lobby_view if len(pages) == 1 else discord.utils.MISSING)
+        lobby_message.attach(callback.resource, pages[0], lobby_view.start_game_button.disabled, has_view=len(pages) == 1) # type: ignore
+        await edit_lobby()
+        await lobby_view.wait()
+        session.lobby_editor.cancel()
+        session.lobby_editor = None
+        logging.info(f"Lobby closed with {lobby_view.value}")
+        if lobby_view.value is None or lobby_view.value == 'cancel':
+            await lobby_message.sync(["**Werewolf**\n*Game canceled*"])
+            await end_game(session)
+            logging.info("Game canceled")
+            return
+        
+        await lobby_message.sync(game.lobby_pages(started=True))
+        game.start()
+        logging.info(f"Game started with players: {[p.name for p in game.players]}")
+        
+        # === Role Assignment ===
+        async with session.lock:
+            # The balance search is CPU bound, so keep it off the event loop
+            await asyncio.to_thread(game.setup_roles, balanced)
+        
+        channel = interaction.channel
+        session.role_view = AssignRolesView(session)
+        session.role_msg = PagedMessage(lambda content, view: channel.send(content, view=view)) # type: ignore
+        await render_roles(session)
+        save_snapshot(session)
+        await finish_role_assignment(session, guild, channel) # type: ignore
+    except Exception:
+        await end_game(session)
+        raise
+
+async def finish_role_assignment(session: GameSession, guild: discord.Guild, channel: discord.TextChannel):
+    """Waits for the narrator to accept the roles, then grants role channel access. Also picks up resumed games."""
+    game, table = session.game, session.table
+    if session.role_view is None or session.role_msg is None: raise Exception("Role assignment not started")
+    await session.role_view.wait()
+    await session.role_msg.sync(game.role_pages(started=True))
     
-    print("Roles assigned.")
+    logging.info("Roles assigned")
     
     # === Game Setup ===
-    for player in client.game.players:
-        if player.role is None:
-            raise Exception("Player with None role after role setup")
-        if player.id < 0: continue # Dummy player
-        if player.role.name in TEXT_ID.__members__:
-            player_member = guild.get_member(player.id)
-            if player_member is None:
-                raise Exception("Unable to get member for player")
-            channel_id = TEXT_ID[player.role.name]
-            role_channel = guild.get_channel(channel_id)
-            if role_channel is None:
-                raise Exception("Unable to get role channel")
-            await role_channel.set_permissions(player_member, read_messages=True, send_messages=True)
-    
-@client.tree.command(name="spectate", description="Join or leave the spectator list for the current game.", guild=TEST_GUILD)
-async def spectate(interaction: discord.Interaction, action: Literal["join", "leave"]):
-    guild = interaction.guild
-    if guild is None or guild.id != TEST_GUILD.id:
-        await interaction.response.send_message("This command can only be used in the configured guild.", ephemeral=True)
+    roles = await provision_roles(guild, table, client.scheduler)
+    session.ledger = OverwriteLedger(game_id=session.ledger_id, guild_id=guild.id)
+    summary = await grant_roles(guild, game, roles, session.ledger, client.scheduler)
+    logging.info(f"Channel access granted: {summary}")
+    for result in summary.failed:
+        await channel.send(f"Failed to grant channel access for {result.label}: {result.error}")
+        
+    game.begin_night()
+    save_snapshot(session)
+    session.phase_task = asyncio.create_task(run_phases(session, guild, channel))
+
+async def resume_role_assignment(session: GameSession, guild: discord.Guild, channel: discord.TextChannel):
+    """finish_role_assignment for a resumed game, which has no command around it to clean up on failure."""
+    try:
+        await finish_role_assignment(session, guild, channel)
+    except Exception:
+        logging.exception("Resumed role assignment failed")
+        await end_game(session)
+
+async def bury_dead(session: GameSession, guild: discord.Guild, deaths: list[int]):
+    """Swaps the dead players' role channel access for DEAD."""
+    if not deaths or session.ledger is None: return
+    roles = await provision_roles(guild, session.table, client.scheduler)
+    summary = await bury(guild, session.game, deaths, roles, session.ledger, client.scheduler)
+    for result in summary.failed:
+        logging.warning(f"Failed to move {result.label}: {result.error}")
+
+async def run_phases(session: GameSession, guild: discord.Guild, channel: discord.TextChannel):
+    """Plays nights and days until a faction wins. Picks up from the saved phase when resumed."""
+    game = session.game
+    try:
+        while game.winner is None:
+            if game.phase == Phase.NIGHT:
+                result = await run_night(session, guild, client.scheduler)
+                save_snapshot(session)
+                await channel.send(night_report(game, result))
+                await bury_dead(session, guild, result.deaths)
+                if game.winner is not None: break
+                
+            # === Day ===
+            target = await run_vote(session, guild, channel)
+            async with session.lock:
+                result = game.resolve_lynch(target)
+            if result.shielded:
+                await channel.send(f"{game.roster.players[target].name} was shielded by the Flower Child and survives.") # type: ignore
+            elif result.deaths:
+                await channel.send("Lynched: " + ", ".join(f"{game.roster.players[user_id].name} ({game.roster.players[user_id].role.value})" for user_id in result.deaths)) # type: ignore
+                await bury_dead(session, guild, result.deaths)
+            if game.winner is not None: break
+            game.begin_night()
+            save_snapshot(session)
+        await channel.send(f"**The {game.winner.value} win!**")
+    except Exception:
+        # Left alone the session would stay open with its access roles granted until /cleanup
+        logging.exception("Game loop failed")
+        await end_game(session)
+        try:
+            await channel.send("Something went wrong running this game, so it has been ended and its channel access revoked.")
+        except discord.HTTPException:
+            pass
         return
+        
+    # The game is over, so archive it and take back the channel access right away
+    summary = await end_game(session)
+    if summary is not None and summary.failed:
+        await channel.send(f"Some channel access couldn't be revoked ({summary}); it will be retried on the next start.")
     
-    if client.game is None:
+@client.tree.command(name="spectate", description="Join or leave the spectator list for the current game.", guilds=GUILDS)
+@instrumented
+async def spectate(interaction: discord.Interaction, action: Literal["join", "leave"]):
+    ctx = await preconditions(interaction, "guild")
+    if ctx is None: return
+    member, session = ctx.member, ctx.session
+    
+    # Fall back to the member's voice channel when used outside the game's text channels
+    if session is None and member.voice is not None and member.voice.channel is not None:
+        session = client.games.get(ctx.guild.id, member.voice.channel.id)
+    if session is None:
         await interaction.response.send_message("There is no active game to spectate.", ephemeral=True)
         return
+    bind(game_id=session.game_id, guild_id=ctx.guild.id)
+    game = session.game
     
-    member = interaction.user
-    if not isinstance(member, discord.Member):
-        await interaction.response.send_message("This command can only be used by guild members.", ephemeral=True)
+    if game.phase != Phase.LOBBY:
+        await interaction.response.send_message(ROSTER_LOCKED, ephemeral=True)
         return
-    if not member in client.game.players and not member in client.game.spectators and not member in client.game.narrators:
+        
+    if member.id not in game.roster:
         await interaction.response.send_message("You are not part of the current game.", ephemeral=True)
         return
-    
+        
     if action == "join":
-        success = client.game.add_spectator(member)
+        async with session.lock:
+            success = game.add_spectator(member)
         if success:
             await interaction.response.send_message(f"You have joined the spectator list.", ephemeral=True)
+            if session.lobby_editor is not None: session.lobby_editor.request()
         else:
             await interaction.response.send_message(f"Failed to join: you are already a spectator or a narrator.", ephemeral=True)
     elif action == "leave":
-        success = client.game.remove_spectator(member)
+        async with session.lock:
+            success = game.remove_spectator(member)
         if success:
             await interaction.response.send_message(f"You have left the spectator list.", ephemeral=True)
+            if session.lobby_editor is not None: session.lobby_editor.request()
         else:
             await interaction.response.send_message(f"Failed to leave: you are not currently a spectator or you are a narrator.", ephemeral=True)
-            
-@client.tree.command(name="role", description="Add or remove a role from the game.", guild=TEST_GUILD)
-async def role(interaction: discord.Interaction, action: Literal["add", "remove", "replace"], role: Role, with_role: Role | None = None):
-    guild = interaction.guild
-    if guild is None or guild.id != TEST_GUILD.id:
-        await interaction.response.send_message("This command can only be used in the configured guild.", ephemeral=True)
-        return
-    
-    if interaction.channel is None or interaction.channel.id != TEXT_ID.NARRATOR_CONTROL:
-        await interaction.response.send_message("This command can only be used in the NARRATOR_CONTROL text channel.", ephemeral=True)
-        return
-    
-    if client.game is None:
-        await interaction.response.send_message("There is no active game to modify roles for.", ephemeral=True)
-        return
-    
-    if client.role_msg is None:
+
+@client.tree.command(name="role", description="Add, remove or replace roles in one go, e.g. \"+2 Werewolf, -Cupid, Angel > Sheriff\".", guilds=GUILDS)
+@app_commands.describe(edits="Comma-separated: +Role adds (+2 Role adds two), -Role removes, Old > New replaces. Villagers make up the rest.")
+@instrumented
+async def role(interaction: discord.Interaction, edits: str):
+    ctx = await preconditions(interaction, session="modify roles for")
+    if ctx is None: return
+    session = ctx.session
+    game = session.game
+    
+    # Once Assign Roles is pressed the roles are final; dealing again would reassign the living and the dead
+    if game.phase != Phase.ROLE_ASSIGNMENT or session.role_view is None or session.role_view.is_finished():
         await interaction.response.send_message("Cannot modify roles: not in role selection stage.", ephemeral=True)
         return
-    
-    if action == "add":
-        if role == Role.VILLAGER:
-            await interaction.response.send_message(f"Cannot add Villager role directly. Remove a role instead.", ephemeral=True)
-            return
-        success = client.game.add_role(role)
-        if success:
-            await interaction.response.send_message(f"Added role {role.value}.", ephemeral=True)
-        else:
-            await interaction.response.send_message(f"Failed to add role {role.value}: no Villager roles left to replace.", ephemeral=True)
-    elif action == "remove" or action == "replace":
-        if role == Role.VILLAGER:
-            await interaction.response.send_message(f"Cannot remove Villager role directly. Add a role instead.", ephemeral=True)
-            return
-        if with_role == Role.VILLAGER: action = "remove"
-        elif with_role is None and action == "replace":
-            await interaction.response.send_message(f"Please specify a role to replace with.", ephemeral=True)
-            return
-        success = client.game.remove_role(role)
-        if success:
-            if action == "remove":
-                await interaction.response.send_message(f"Removed role {role.value}.", ephemeral=True)
-            elif action == "replace":
-                success_add = client.game.add_role(with_role) # type: ignore
-                if success_add:
-                    await interaction.response.send_message(f"Replaced role {role.value} with {with_role.value}.", ephemeral=True) # type: ignore
-                else:
-                    await interaction.response.send_message(f"Failed to add role {with_role.value}.", ephemeral=True) # type: ignore
-        else:
-            if role == Role.WEREWOLF:
-                await interaction.response.send_message(f"Failed to remove role {role.value}: cannot remove last Werewolf.", ephemeral=True)
-            else:
-                await interaction.response.send_message(f"Failed to remove role {role.value}: role not in game.", ephemeral=True)
         
-    await client.role_msg.edit(content=client.game.role_msg())
+    try:
+        batch = parse_role_edits(edits, len(game.players))
+    except ValueError as e:
+        await interaction.response.send_message(str(e), ephemeral=True)
+        return
+        
+    # The whole batch is one deal and one message update, however many edits it holds
+    async with session.lock:
+        results = game.edit_roles(batch)
+    summary = "\n".join(results) or "No edits given."
+    if len(summary) > MESSAGE_LIMIT: summary = summary[:MESSAGE_LIMIT - 2] + "\n…"
+    await interaction.response.send_message(summary, ephemeral=True)
+    await render_roles(session)
+    save_snapshot(session)
 
-@client.tree.command(name="dummies", description="Set a number of dummy players.", guild=TEST_GUILD)
+@client.tree.command(name="dummies", description="Set a number of dummy players.", guilds=GUILDS)
+@instrumented
 async def dummies(interaction: discord.Interaction, count: int):
-    guild = interaction.guild
-    if guild is None or guild.id != TEST_GUILD.id:
-        await interaction.response.send_message("This command can only be used in the configured guild.", ephemeral=True)
-        return
-    
-    if interaction.channel is None or interaction.channel.id != TEXT_ID.NARRATOR_CONTROL:
-        await interaction.response.send_message("This command can only be used in the NARRATOR_CONTROL text channel.", ephemeral=True)
-        return
-    
-    if client.game is None:
-        await interaction.response.send_message("There is no active game to set dummies for.", ephemeral=True)
-        return
+    ctx = await preconditions(interaction, session="set dummies for", lobby=True)
+    if ctx is None: return
+    session = ctx.session
     
     if count < 0:
         await interaction.response.send_message("Dummy count cannot be negative.", ephemeral=True)
         return
-    
-    client.game.dummies = [Player(id=-(i+1), name=f"Dummy {i+1}") for i in range(count)]
-    client.game.set_players()
+        
+    async with session.lock:
+        success = session.game.roster.set_dummies(count)
+    if not success:
+        await interaction.response.send_message(ROSTER_LOCKED, ephemeral=True)
+        return
     await interaction.response.send_message(f"Set {count} dummy players for the game.", ephemeral=True)
-    
-@client.tree.command(name="debug-narrator", description="Set yourself as a narrator (without joining the call).", guild=TEST_GUILD)
+    if session.lobby_editor is not None: session.lobby_editor.request()
+
+@client.tree.command(name="debug-narrator", description="Set yourself as a narrator (without joining the call).", guilds=GUILDS)
+@instrumented
 async def debug_narrator(interaction: discord.Interaction):
-    guild = interaction.guild
-    if guild is None or guild.id != TEST_GUILD.id:
-        await interaction.response.send_message("This command can only be used in the configured guild.", ephemeral=True)
-        return
-    
-    if interaction.channel is None or interaction.channel.id != TEXT_ID.NARRATOR_CONTROL:
-        await interaction.response.send_message("This command can only be used in the NARRATOR_CONTROL text channel.", ephemeral=True)
-        return
-    
-    if client.game is None:
-        await interaction.response.send_message("There is no active game to set a debug narrator for.", ephemeral=True)
-        return
-    
-    member = interaction.user
-    if not isinstance(member, discord.Member):
-        await interaction.response.send_message("This command can only be used by guild members.", ephemeral=True)
+    ctx = await preconditions(interaction, session="set a debug narrator for", lobby=True)
+    if ctx is None: return
+    session = ctx.session
+        
+    async with session.lock:
+        success = session.game.roster.set_debug_narrator(ctx.member)
+    if not success:
+        await interaction.response.send_message(ROSTER_LOCKED, ephemeral=True)
         return
-    
-    client.game.debug_narrator = member
-    client.game.set_players()
     await interaction.response.send_message(f"You have been set as a debug narrator for the game.", ephemeral=True)
+    if session.lobby_editor is not None: session.lobby_editor.request()
 
-@client.tree.command(name="cleanup", description="Clean up any setup from a previous game of Werewolf.")
+@client.tree.command(name="cleanup", description="End the current game of Werewolf and revoke the channel access it granted.")
+@instrumented
 async def cleanup(interaction: discord.Interaction):
-    guild = interaction.guild
-    if guild is None or guild.id != TEST_GUILD.id:
-        await interaction.response.send_message("This command can only be used in the configured guild.", ephemeral=True)
-        return
-    
-    for channel_id in TEXT_ID:
-        if channel_id == TEXT_ID.NARRATOR_CONTROL or channel_id == TEXT_ID.GENERAL: continue
-        channel = guild.get_channel(channel_id)
-        if channel is None:
-            await interaction.response.send_message(f"Unable to locate {channel_id.name} channel.", ephemeral=True)
-            return
-        
-        for target, overwrite in list(channel.overwrites.items()):
-            if isinstance(target, discord.Member):
-                await channel.set_permissions(target, overwrite=None)
-                
-    await interaction.response.send_message("Cleaned up access setup.")
+    ctx = await preconditions(interaction, session="clean up")
+    if ctx is None: return
+    session = ctx.session
+    
+    await interaction.response.defer()
+    summary = await end_game(session)
+    if summary is None:
+        await interaction.followup.send("Game ended. No channel access to clean up.")
+    elif summary.failed:
+        await interaction.followup.send(f"Cleaned up access setup with errors: {summary}\n" + "\n".join(f"- {r.label}: {r.error}" for r in summary.failed))
+    else:
+        await interaction.followup.send(f"Cleaned up access setup. ({summary})")
+
+@client.tree.command(name="stats", description="Show command latency and Discord API usage. Narrators only.", guilds=GUILDS)
+@instrumented
+async def stats(interaction: discord.Interaction):
+    ctx = await preconditions(interaction, "table", narrator=True)
+    if ctx is None: return
+    await interaction.response.send_message(stats_summary(), ephemeral=True)
 
 # ============================================================
 # MAIN
@@ -448,10 +642,12 @@ async def cleanup(interaction: discord.Interaction):
 def main():
     token = environ["DISCORD_BOT_TOKEN"]
     
-    # logging.basicConfig(level=logging.DEBUG)
-    handler = logging.FileHandler(filename='discord.log', encoding='utf-8', mode='w')
-    
-    client.run(token, log_handler=handler, log_level=logging.INFO)
+    # Pass level=logging.DEBUG to see gateway traffic
+    listener = setup_logging()
+    try:
+        client.run(token, log_handler=None)
+    finally:
+        listener.stop()
 
 if __name__ == "__main__":
     main()
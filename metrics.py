@@ -0,0 +1,185 @@
+import asyncio
+import bisect
+import functools
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, TypeVar
+
+import aiohttp
+
+log = logging.getLogger(__name__)
+
+METRICS_PATH = Path(os.environ.get("WEREWOLF_METRICS_PATH", "metrics.prom"))
+METRICS_INTERVAL = 30.0 # Seconds between Prometheus file writes
+
+# Upper bounds in seconds, from a quick button defer up to a whole lobby
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# ============================================================
+# COLLECTORS
+# ============================================================
+
+class Histogram:
+    """Fixed-bucket latency histogram. Observing is a bisect and two additions."""
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1) # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation; good enough for a summary."""
+        if self.count == 0: return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank: return bound
+        return float("inf")
+
+class Metrics:
+    def __init__(self):
+        self.started = time.time()
+        self.latency: dict[str, Histogram] = {} # Handler -> latency
+        self.errors: dict[str, int] = {} # Handler -> uncaught exceptions
+        self.api_calls: dict[tuple[str, int], int] = {} # (route, status) -> requests
+        self.counters: dict[str, int] = {}
+
+    def observe(self, handler: str, seconds: float):
+        histogram = self.latency.get(handler)
+        if histogram is None:
+            histogram = self.latency[handler] = Histogram()
+        histogram.observe(seconds)
+
+    def record_request(self, route: str, status: int):
+        key = (route, status)
+        self.api_calls[key] = self.api_calls.get(key, 0) + 1
+
+    def inc(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    @property
+    def rate_limited(self) -> int:
+        return sum(count for (_, status), count in self.api_calls.items() if status == 429)
+
+    def routes(self) -> dict[str, int]:
+        totals: dict[str, int] = {}
+        for (route, _), count in self.api_calls.items():
+            totals[route] = totals.get(route, 0) + count
+        return totals
+
+metrics = Metrics()
+
+# ============================================================
+# INSTRUMENTATION
+# ============================================================
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+def instrumented(func: F) -> F:
+    """
+    Records the latency of a command or button callback under its function name. Wrap the
+    function directly, below the discord.py decorators, so they still see its signature.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            metrics.errors[name] = metrics.errors.get(name, 0) + 1
+            raise
+        finally:
+            metrics.observe(name, time.perf_counter() - started)
+    return wrapper # type: ignore
+
+_SNOWFLAKE = re.compile(r"/\d{15,}")
+_TOKEN = re.compile(r"/[\w-]{40,}")
+
+def route_of(method: str, path: str) -> str:
+    """Collapses IDs and interaction tokens so requests group by route."""
+    return f"{method} {_TOKEN.sub('/{token}', _SNOWFLAKE.sub('/{id}', path))}"
+
+def trace_config() -> aiohttp.TraceConfig:
+    """Counts every HTTP request discord.py makes, retries and 429s included."""
+    async def on_request_end(session, context, params: aiohttp.TraceRequestEndParams):
+        metrics.record_request(route_of(params.method, params.url.path), params.response.status)
+    trace = aiohttp.TraceConfig()
+    trace.on_request_end.append(on_request_end)
+    return trace
+
+# ============================================================
+# EXPORT
+# ============================================================
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+def prometheus_text() -> str:
+    lines = [
+        "# HELP werewolf_handler_seconds Time spent in command and button handlers.",
+        "# TYPE werewolf_handler_seconds histogram",
+    ]
+    for handler, histogram in sorted(metrics.latency.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.bounds + (float("inf"),), histogram.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'werewolf_handler_seconds_bucket{{handler="{handler}",le="{le}"}} {cumulative}')
+        lines.append(f'werewolf_handler_seconds_sum{{handler="{handler}"}} {histogram.sum}')
+        lines.append(f'werewolf_handler_seconds_count{{handler="{handler}"}} {histogram.count}')
+
+    lines += ["# HELP werewolf_handler_errors_total Uncaught exceptions in handlers.", "# TYPE werewolf_handler_errors_total counter"]
+    for handler, count in sorted(metrics.errors.items()):
+        lines.append(f'werewolf_handler_errors_total{{handler="{handler}"}} {count}')
+
+    lines += ["# HELP werewolf_api_requests_total Discord API requests by route and status.", "# TYPE werewolf_api_requests_total counter"]
+    for (route, status), count in sorted(metrics.api_calls.items()):
+        lines.append(f'werewolf_api_requests_total{{route="{_escape(route)}",status="{status}"}} {count}')
+
+    for name, count in sorted(metrics.counters.items()):
+        lines += [f"# TYPE werewolf_{name}_total counter", f"werewolf_{name}_total {count}"]
+    lines += ["# TYPE werewolf_start_time_seconds gauge", f"werewolf_start_time_seconds {metrics.started}"]
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path: Path = METRICS_PATH):
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+async def export_periodically(path: Path = METRICS_PATH, interval: float = METRICS_INTERVAL):
+    """Rewrites the Prometheus text file for node_exporter's textfile collector, or any scraper."""
+    while True:
+        try:
+            write_prometheus(path)
+        except OSError:
+            log.exception(f"Failed to write metrics to {path}")
+        await asyncio.sleep(interval)
+
+def stats_summary() -> str:
+    """A short human-readable digest for /stats."""
+    uptime = time.time() - metrics.started
+    lines = [f"**Werewolf stats** (up {uptime / 3600:.1f}h)", "```", f"{'handler':<22} {'calls':>6} {'p50':>7} {'p99':>7} {'errors':>6}"]
+    for handler, histogram in sorted(metrics.latency.items(), key=lambda item: -item[1].count):
+        lines.append(f"{handler:<22} {histogram.count:>6} {histogram.quantile(0.5):>6}s {histogram.quantile(0.99):>6}s {metrics.errors.get(handler, 0):>6}")
+    lines.append("")
+    routes = sorted(metrics.routes().items(), key=lambda item: -item[1])
+    lines.append(f"API requests: {sum(count for _, count in routes)} ({metrics.rate_limited} rate limited)")
+    for route, count in routes[:8]:
+        lines.append(f"  {count:>6} {route}")
+    for name, count in sorted(metrics.counters.items()):
+        lines.append(f"{name.replace('_', ' ').capitalize()}: {count}")
+    lines.append("```")
+    return "\n".join(lines)
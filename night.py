@@ -0,0 +1,165 @@
+import asyncio
+import logging
+
+import discord
+
+from game_config import *
+from core import NightAction, NightResult, Player, WerewolfGame
+from channels import channel_cache
+from metrics import instrumented
+from registry import GameSession
+from scheduler import RestCall, RestScheduler, messages_bucket
+
+log = logging.getLogger(__name__)
+
+SELECT_LIMIT = 25 # Discord caps a select menu at 25 options, and a message at 5 menus
+NOBODY = "nobody"
+
+PROMPTS = {
+    Role.CUPID: "Choose two players to fall in love.",
+    Role.FISHERMAN: "Choose a player to pull into your boat.",
+    Role.ANGEL: "Choose a player to protect.",
+    Role.WEREWOLF: "Choose your victim. The pack's most voted target dies.",
+    Role.FORTUNE_TELLER: "Choose a player whose role you want to see.",
+    Role.UNDERTAKER: "Choose a dead player whose role you want to see.",
+    Role.FLOWER_CHILD: "Choose a player to shield from tomorrow's lynch, or nobody to save your power.",
+}
+
+# ============================================================
+# TARGET SELECTION
+# ============================================================
+
+def target_selects(candidates: list[Player], placeholder: str, picks: int = 1, nobody: str | None = None) -> list[discord.ui.Select]:
+    """Select menus offering `candidates`, 25 to a menu. `nobody` labels an extra option for choosing no one."""
+    options = [discord.SelectOption(label=nobody, value=NOBODY)] if nobody is not None else []
+    options += [discord.SelectOption(label=player.name[:100], value=str(player.id)) for player in candidates]
+    selects = []
+    for row, start in enumerate(range(0, min(len(options), SELECT_LIMIT * 5), SELECT_LIMIT)):
+        chunk = options[start:start + SELECT_LIMIT]
+        selects.append(discord.ui.Select(placeholder=placeholder, options=chunk, min_values=1, max_values=min(picks, len(chunk)), row=row))
+    return selects
+
+class TargetView(discord.ui.View):
+    """
+    Collects a choice of `picks` targets from each of `actors` through select menus, split
+    into chunks of 25. Actors can change their mind until `required` of them have chosen.
+    There is no view timeout, since discord.py restarts it on every interaction; callers
+    bound the wait with `wait_until` instead.
+    """
+
+    def __init__(self, actors: set[int], candidates: list[Player], picks: int = 1, required: int | None = None, allow_nobody: bool = False):
+        super().__init__(timeout=None)
+        self.actors = actors
+        self.names = {player.id: player.name for player in candidates}
+        self.picks = picks
+        self.required = required if required is not None else len(actors)
+        self.submissions: dict[int, tuple[int, ...]] = {} # Actor ID -> targets, empty for nobody
+        self.pending: dict[int, list[int]] = {} # Partial picks spread over several menus
+        self.done = asyncio.Event()
+
+        placeholder = "Choose a target" if picks == 1 else f"Choose {picks} targets"
+        for select in target_selects(candidates, placeholder, picks, "Nobody" if allow_nobody else None):
+            select.callback = lambda interaction, select=select: self.choose(interaction, select)
+            self.add_item(select)
+
+    @instrumented
+    async def choose(self, interaction: discord.Interaction, select: discord.ui.Select):
+        if interaction.user.id not in self.actors or self.done.is_set():
+            await interaction.response.send_message("You can't act on this.", ephemeral=True)
+            return
+        if NOBODY in select.values:
+            targets: list[int] = []
+        else:
+            picked = [int(value) for value in select.values]
+            if len(picked) < self.picks:
+                picked = (self.pending.get(interaction.user.id, []) + picked)[-self.picks:]
+            if len(picked) < self.picks:
+                self.pending[interaction.user.id] = picked
+                await interaction.response.send_message(f"Picked {self.names[picked[0]]}, choose {self.picks - len(picked)} more.", ephemeral=True)
+                return
+            targets = picked
+        self.pending.pop(interaction.user.id, None)
+        self.submissions[interaction.user.id] = tuple(targets)
+        chosen = ", ".join(self.names[target] for target in targets) or "nobody"
+        await interaction.response.send_message(f"You chose {chosen}.", ephemeral=True)
+        if len(self.submissions) >= self.required:
+            self.done.set()
+            self.stop()
+
+    async def wait_until(self, deadline: float | None) -> bool:
+        """Waits for every required choice or `deadline` seconds, whichever comes first. Returns whether all arrived."""
+        try:
+            await asyncio.wait_for(self.done.wait(), deadline)
+            return True
+        except asyncio.TimeoutError:
+            self.done.set()
+            self.stop()
+            return False
+
+def night_candidates(game: WerewolfGame, role: Role, actors: list[Player]) -> list[Player]:
+    if role == Role.UNDERTAKER:
+        return [player for player in game.roster.players.values() if player.dead]
+    if role == Role.WEREWOLF:
+        return [player for player in game.alive() if player.role != Role.WEREWOLF]
+    if role == Role.CUPID:
+        return game.alive()
+    actor_ids = {actor.id for actor in actors}
+    return [player for player in game.alive() if player.id not in actor_ids]
+
+# ============================================================
+# NIGHT
+# ============================================================
+
+async def run_night(session: GameSession, guild: discord.Guild, scheduler: RestScheduler) -> NightResult:
+    """
+    Opens every acting role's channel at once and resolves the night when all actions are in
+    or the deadline passes, so the night lasts as long as its slowest role rather than all of
+    them in turn. Roles with no one able to act, like dummies, are skipped.
+    """
+    game, table = session.game, session.table
+    views: dict[Role, TargetView] = {}
+    channels: dict[Role, discord.TextChannel] = {}
+    calls = []
+    for role, actors in game.night_roles().items():
+        humans = {player.id for player in actors if player.id >= 0}
+        channel = channel_cache.text(guild, table, ROLES[role].channel) if ROLES[role].channel is not None else None
+        picks = 2 if role == Role.CUPID else 1
+        candidates = night_candidates(game, role, actors)
+        if not humans or channel is None or len(candidates) < picks: continue
+        views[role] = TargetView(humans, candidates, picks, allow_nobody=role == Role.FLOWER_CHILD)
+        channels[role] = channel
+        calls.append(RestCall(role.name, messages_bucket(channel),
+                              lambda c=channel, r=role: c.send(f"**Night {game.day}**\n{PROMPTS.get(r, 'Choose a target.')}", view=views[r])))
+
+    summary = await scheduler.run(calls)
+    messages = {}
+    for result in summary.results:
+        if result.ok: messages[Role[result.label]] = result.value
+        else: views.pop(Role[result.label]).stop()
+
+    started = asyncio.get_running_loop().time()
+    complete = await asyncio.gather(*(view.wait_until(NIGHT_DEADLINES.get(role, NIGHT_DEADLINE)) for role, view in views.items()))
+    log.info(f"Night {game.day} closed after {asyncio.get_running_loop().time() - started:.1f}s ({sum(complete)}/{len(views)} roles complete)")
+
+    actions = [NightAction(actor, role, targets) for role, view in views.items() for actor, targets in view.submissions.items() if targets]
+    async with session.lock:
+        result = game.resolve_night(actions)
+
+    # Close the menus and tell the seers what they saw
+    calls = [RestCall(f"close {role.name}", messages_bucket(channels[role]), lambda m=message: m.edit(view=None)) for role, message in messages.items()]
+    players = game.roster.players
+    for actor_id, (target_id, target_role) in result.revealed.items():
+        role = players[actor_id].role
+        if role in channels:
+            calls.append(RestCall(f"reveal {role.name}", messages_bucket(channels[role]),
+                                  lambda c=channels[role], t=target_id, r=target_role: c.send(f"{players[t].name} is a **{r.value}**.")))
+    await scheduler.run(calls)
+    return result
+
+def night_report(game: WerewolfGame, result: NightResult) -> str:
+    players = game.roster.players
+    deaths = ", ".join(f"{players[user_id].name} ({players[user_id].role.value})" for user_id in result.deaths) or "Nobody" # type: ignore
+    msg = f"**Night {game.day} is over.**\nDied: {deaths}"
+    if game.shielded is not None:
+        msg += f"\n*{players[game.shielded].name} is shielded from today's lynch.*"
+    return msg
@@ -0,0 +1,70 @@
+import asyncio
+from dataclasses import dataclass, field
+
+import discord
+
+from guild_config import TableConfig
+from debounce import DebouncedEditor
+from ledger import OverwriteLedger
+from render import PagedMessage
+from core import WerewolfGame
+
+GameKey = tuple[int, int] # (guild ID, narrator control channel ID)
+
+@dataclass(eq=False)
+class GameSession:
+    key: GameKey
+    table: TableConfig
+    game: WerewolfGame
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    role_msg: PagedMessage | None = None
+    role_view: discord.ui.View | None = None
+    lobby_editor: DebouncedEditor | None = None
+    ledger: OverwriteLedger | None = None
+    phase_task: asyncio.Task | None = None # Drives the game: a resumed role assignment, then nights and days
+
+    @property
+    def game_id(self) -> str:
+        return f"{self.key[0]}-{self.key[1]}"
+
+    @property
+    def ledger_id(self) -> str:
+        # Unique per game, so grants a failed revoke left behind aren't overwritten by the table's next game
+        return f"{self.game_id}-{self.game.log.seed}"
+
+class GameRegistry:
+    """
+    Tracks every open game across guilds. Any channel belonging to a table (control, voice
+    or role channel) maps back to that table's game, so lookups from an interaction are O(1).
+    """
+
+    def __init__(self, tables: list[TableConfig]):
+        self.tables: dict[int, TableConfig] = {}
+        for table in tables:
+            for channel_id in table.channel_ids:
+                self.tables[channel_id] = table
+        self.sessions: dict[GameKey, GameSession] = {}
+
+    def table_for(self, guild_id: int | None, channel_id: int | None) -> TableConfig | None:
+        """The table owning this channel, if it's configured for this guild."""
+        table = self.tables.get(channel_id) if channel_id is not None else None
+        if table is None or table.guild_id != guild_id: return None
+        return table
+
+    def get(self, guild_id: int | None, channel_id: int | None) -> GameSession | None:
+        table = self.table_for(guild_id, channel_id)
+        if table is None: return None
+        return self.sessions.get((table.guild_id, table.narrator_control))
+
+    def open(self, guild_id: int, table: TableConfig, game: WerewolfGame) -> GameSession:
+        key = (guild_id, table.narrator_control)
+        if key in self.sessions:
+            raise ValueError(f"A game is already open for {key}")
+        session = GameSession(key, table, game)
+        self.sessions[key] = session
+        return session
+
+    def close(self, session: GameSession):
+        if self.sessions.get(session.key) is session:
+            del self.sessions[session.key]
@@ -0,0 +1,55 @@
+from typing import Awaitable, Callable, Hashable
+
+import discord
+
+# ============================================================
+# DELIVERY
+# ============================================================
+
+class PagedMessage:
+    """
+    Keeps a run of Discord messages in sync with a list of pages. Only pages whose content
+    changed are edited; extra pages are sent or deleted as the page count changes. The view,
+    if any, is always attached to the last page.
+    """
+
+    def __init__(self, send: Callable[[str, discord.ui.View | None], Awaitable[discord.Message]]):
+        self.send = send
+        self.messages: list[discord.Message] = []
+        self.sent: list[tuple[str, Hashable]] = []
+
+    def attach(self, message: discord.Message, page: str, view_key: Hashable = None, has_view: bool = True):
+        """Registers an already sent message as the first page."""
+        self.messages = [message]
+        self.sent = [(page, ("view", view_key) if has_view else None)]
+
+    def restore(self, messages: list[discord.Message | discord.PartialMessage], pages: list[str], view_key: Hashable = None, has_view: bool = False):
+        """Re-adopts messages sent before a restart, assuming they still show `pages`."""
+        self.messages = list(messages) # type: ignore
+        self.sent = [(page, None) for page in pages[:len(messages)]]
+        if self.sent and has_view:
+            self.sent[-1] = (self.sent[-1][0], ("view", view_key))
+            
+    async def sync(self, pages: list[str], view: discord.ui.View | None = None, view_key: Hashable = None) -> int:
+        edits = 0
+        for i, page in enumerate(pages):
+            last = i == len(pages) - 1
+            state = (page, ("view", view_key) if last and view is not None else None)
+            page_view = view if last else None
+            if i < len(self.messages):
+                if self.sent[i] == state: continue
+                await self.messages[i].edit(content=page, view=page_view)
+                self.sent[i] = state
+            else:
+                self.messages.append(await self.send(page, page_view))
+                self.sent.append(state)
+            edits += 1
+
+        for message in self.messages[len(pages):]:
+            try:
+                await message.delete()
+            except discord.NotFound:
+                pass
+        del self.messages[len(pages):]
+        del self.sent[len(pages):]
+        return edits
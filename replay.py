@@ -0,0 +1,85 @@
+#!/usr/bin/env -S uv run --script
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from game_config import *
+from core import replay
+from snapshot import GAME_LOG_DIR
+
+# ============================================================
+# REPLAYS
+# ============================================================
+
+def load(paths: list[Path]) -> list[dict]:
+    archives = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        data["path"] = str(path)
+        archives.append(data)
+    return archives
+
+def show(archive: dict, until: int | None):
+    """Prints one game as it stood after `until` events, for reproducing a bug report."""
+    events = archive["state"]["log"]["events"]
+    game = replay(archive["state"]["log"], until)
+    print(f"{archive['game_id']}: {min(until or len(events), len(events))}/{len(events)} events, phase {game.phase.value}, day {game.day}")
+    for kind, *args in events[:until][-5:]:
+        print(f"  last: {kind} {args}")
+    for player in game.players:
+        status = "dead" if player.dead else "alive"
+        print(f"  {player.name:<20} {player.role.value if player.role else '-':<15} {status}")
+
+def season(archives: list[dict], verify: bool):
+    """Replays every game and aggregates results across them."""
+    wins = {faction: 0 for faction in Faction}
+    role_wins: dict[Role, list[int]] = {role: [0, 0] for role in Role} # Role -> [wins, games]
+    days = events = mismatches = 0
+
+    started = time.perf_counter()
+    for archive in archives:
+        state = archive["state"]
+        game = replay(state["log"])
+        events += len(state["log"]["events"])
+        if verify and json.loads(json.dumps(game.to_state())) != state:
+            mismatches += 1
+            print(f"Replay of {archive['path']} does not match the recorded state")
+        days += game.day
+        if game.winner is None: continue
+        wins[game.winner] += 1
+        for player in game.players:
+            if player.role is None: continue
+            role_wins[player.role][1] += 1
+            if FACTION[player.role] == game.winner: role_wins[player.role][0] += 1
+    elapsed = time.perf_counter() - started
+
+    print(f"Replayed {len(archives)} games ({events} events) in {elapsed * 1000:.1f} ms, {events / max(elapsed, 1e-9):.0f} events/s")
+    if verify: print(f"{len(archives) - mismatches}/{len(archives)} replays match their recorded state")
+    finished = sum(wins.values())
+    print(f"Finished games: {finished}, average days: {days / max(1, len(archives)):.1f}")
+    for faction, count in wins.items():
+        print(f"  {faction.value:<12} {count:>5} ({count / max(1, finished):.0%})")
+    print(f"{'role':<15} {'games':>6} {'win rate':>9}")
+    for role, (won, played) in sorted(role_wins.items(), key=lambda item: -item[1][1]):
+        if played: print(f"{role.value:<15} {played:>6} {won / played:>9.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replays archived games from their event logs.")
+    parser.add_argument("paths", type=Path, nargs="*", help=f"Archived games, defaults to everything in {GAME_LOG_DIR}/")
+    parser.add_argument("--until", type=int, help="Show the first game as it stood after this many events")
+    parser.add_argument("--verify", action="store_true", help="Check each replay reproduces the recorded final state")
+    args = parser.parse_args()
+
+    archives = load(args.paths or sorted(GAME_LOG_DIR.glob("*.json")))
+    if not archives:
+        print("No archived games found.")
+    elif args.until is not None:
+        show(archives[0], args.until)
+    else:
+        season(archives, args.verify)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable
+
+import discord
+
+log = logging.getLogger(__name__)
+
+# ============================================================
+# CALL DEFINITIONS
+# ============================================================
+
+@dataclass
+class RestCall:
+    label: str
+    bucket: Hashable
+    run: Callable[[], Awaitable[Any]]
+
+@dataclass
+class CallResult:
+    label: str
+    ok: bool
+    attempts: int
+    elapsed: float
+    error: str | None = None
+    value: Any = None
+
+@dataclass
+class ScheduleSummary:
+    results: list[CallResult] = field(default_factory=list)
+    elapsed: float = 0.0
+    rate_limited: int = 0
+
+    @property
+    def failed(self) -> list[CallResult]:
+        return [r for r in self.results if not r.ok]
+
+    def __str__(self) -> str:
+        msg = f"{len(self.results) - len(self.failed)}/{len(self.results)} calls succeeded in {self.elapsed:.2f}s"
+        if self.rate_limited: msg += f" ({self.rate_limited} rate limited)"
+        return msg
+
+def permissions_bucket(channel_id: int) -> Hashable:
+    # Overwrite edits share the channel's major-parameter bucket
+    return ("permissions", channel_id)
+
+def messages_bucket(channel: discord.abc.Messageable) -> Hashable:
+    return ("messages", getattr(channel, "id", None))
+
+def member_bucket(member: discord.Member) -> Hashable:
+    return ("member", member.guild.id)
+
+# ============================================================
+# SCHEDULER
+# ============================================================
+
+class RestScheduler:
+    """
+    Runs batches of REST calls concurrently, up to `max_concurrency` at once. Calls sharing a
+    bucket are limited to `bucket_concurrency` in flight, since Discord rate limits them
+    together; a bucket with budget left still overlaps its round trips. discord.py already
+    waits on the X-RateLimit headers before each request, so this only needs to back off
+    buckets that still hit a 429 and retry the calls that failed.
+    """
+
+    def __init__(self, max_concurrency: int = 8, bucket_concurrency: int = 4, max_retries: int = 3, base_backoff: float = 0.5):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.bucket_concurrency = bucket_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.blocked_until: dict[Hashable, float] = {}
+
+    async def run(self, calls: list[RestCall]) -> ScheduleSummary:
+        started = time.perf_counter()
+        buckets: dict[Hashable, list[RestCall]] = {}
+        for call in calls:
+            buckets.setdefault(call.bucket, []).append(call)
+
+        summary = ScheduleSummary()
+        bucket_results = await asyncio.gather(*(self._run_bucket(bucket, bucket_calls, summary) for bucket, bucket_calls in buckets.items()))
+        summary.results = [result for results in bucket_results for result in results]
+        summary.elapsed = time.perf_counter() - started
+        log.info(f"REST batch: {summary} across {len(buckets)} buckets")
+        return summary
+
+    async def _run_bucket(self, bucket: Hashable, calls: list[RestCall], summary: ScheduleSummary) -> list[CallResult]:
+        limit = asyncio.Semaphore(self.bucket_concurrency)
+
+        async def run_call(call: RestCall) -> CallResult:
+            async with limit:
+                return await self._run_call(bucket, call, summary)
+        return list(await asyncio.gather(*(run_call(call) for call in calls)))
+
+    async def _run_call(self, bucket: Hashable, call: RestCall, summary: ScheduleSummary) -> CallResult:
+        started = time.perf_counter()
+        attempts = 0
+        while True:
+            attempts += 1
+            wait = self.blocked_until.get(bucket, 0) - time.monotonic()
+            if wait > 0: await asyncio.sleep(wait)
+            try:
+                async with self.semaphore:
+                    value = await call.run()
+                return CallResult(call.label, True, attempts, time.perf_counter() - started, value=value)
+            except (discord.RateLimited, discord.HTTPException) as e:
+                retry_after = self._retry_after(e)
+                if retry_after is None or attempts > self.max_retries:
+                    return CallResult(call.label, False, attempts, time.perf_counter() - started, error=str(e))
+                summary.rate_limited += 1
+                backoff = max(retry_after, self.base_backoff * 2 ** (attempts - 1))
+                self.blocked_until[bucket] = time.monotonic() + backoff
+                log.warning(f"Rate limited on {call.label}, retrying in {backoff:.2f}s")
+            except Exception as e:
+                return CallResult(call.label, False, attempts, time.perf_counter() - started, error=str(e))
+
+    @staticmethod
+    def _retry_after(e: Exception) -> float | None:
+        if isinstance(e, discord.RateLimited):
+            return e.retry_after
+        if isinstance(e, discord.HTTPException) and e.status == 429:
+            header = e.response.headers.get("Retry-After") if e.response is not None else None
+            return float(header) if header else 1.0
+        return None
@@ -0,0 +1,67 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from registry import GameSession
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = Path("snapshots")
+GAME_LOG_DIR = Path("game_logs")
+SNAPSHOT_VERSION = 2 # Bump when the layout changes; older snapshots are then ignored
+
+def snapshot_path(game_id: str) -> Path:
+    return SNAPSHOT_DIR / f"{game_id}.json"
+
+def save_snapshot(session: GameSession):
+    """Atomically writes the session's state so the game can be resumed after a restart."""
+    role_msg = None
+    if session.role_msg is not None and session.role_msg.messages:
+        role_msg = {
+            "channel_id": session.role_msg.messages[0].channel.id,
+            "message_ids": [message.id for message in session.role_msg.messages],
+        }
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "guild_id": session.key[0],
+        "table": session.table.narrator_control,
+        "game": session.game.to_state(),
+        "role_msg": role_msg,
+    }
+
+    SNAPSHOT_DIR.mkdir(exist_ok=True)
+    path = snapshot_path(session.game_id)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def delete_snapshot(session: GameSession):
+    snapshot_path(session.game_id).unlink(missing_ok=True)
+
+def load_snapshots() -> list[dict]:
+    if not SNAPSHOT_DIR.exists(): return []
+    snapshots = []
+    for path in sorted(SNAPSHOT_DIR.glob("*.json")):
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            log.exception(f"Unreadable snapshot {path}")
+            continue
+        if data.get("version") != SNAPSHOT_VERSION:
+            log.warning(f"Skipping snapshot {path} with version {data.get('version')}")
+            continue
+        snapshots.append(data)
+    return snapshots
+
+def archive_game(session: GameSession) -> Path:
+    """Keeps the finished game's state and event log for replays and season statistics."""
+    GAME_LOG_DIR.mkdir(exist_ok=True)
+    path = GAME_LOG_DIR / f"{session.game_id}-{int(time.time())}.json"
+    data = {"game_id": session.game_id, "guild_id": session.key[0], "ended": time.time(), "state": session.game.to_state()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    return path